@@ -0,0 +1,175 @@
+# benchmark/cluster_bench.py
+#
+# docx2md 헤더/푸터 반복 위치 탐지 벤치마크.
+# 기존 구현(아래 legacy_*, 클러스터마다 모든 클러스터/모든 y 좌표를 비교)과 docx2md의
+# 단일 스윕 클러스터링 + 이진 탐색 구현을 합성 문서(기본 500페이지)로 비교하고, 제거할 y 좌표 집합과
+# 제거 후 남는 텍스트 블록이 같은지 확인합니다.
+#   - 페이지마다 헤더/페이지 번호/푸터(조금씩 흔들리는 y 좌표)와 본문 블록(임의의 y 좌표)을 만듭니다.
+#
+# 사용법: python benchmark/cluster_bench.py [--pages 500] [--blocks 40] [--repeat 3] [--seed 0]
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict, namedtuple
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx2md import (  # noqa: E402
+    detect_common_y_positions, detect_repeated_footer_positions, near_any_position,
+)
+
+# pymupdf4llm 페이지 문서(docx2md.LlamaPage) 대신 쓰는 최소 객체 (metadata의 page, bbox만 사용)
+SyntheticDocument = namedtuple("SyntheticDocument", ["text", "metadata"])
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.0, 842.0
+
+
+def legacy_cluster_positions(positions, tolerance=2.0):
+    """
+    기존 구현 그대로 (비교용)
+    """
+    clusters = []
+    for pos in sorted(positions):
+        found = False
+        for cluster in clusters:
+            if abs(cluster[0] - pos) <= tolerance:
+                cluster[0] = (cluster[0] * cluster[1] + pos) / (cluster[1] + 1)
+                cluster[1] += 1
+                found = True
+                break
+        if not found:
+            clusters.append([pos, 1])
+    return [cluster[0] for cluster in clusters]
+
+
+def legacy_count_clusters(page_occurrences, clusters, tolerance, min_count):
+    common_y = set()
+    for cluster in clusters:
+        count = 0
+        for y, pages in page_occurrences.items():
+            if abs(y - cluster) <= tolerance:
+                count += len(pages)
+        if count >= min_count:
+            common_y.add(round(cluster, 1))
+    return common_y
+
+
+def legacy_detect_common_y_positions(documents, page_count, tolerance=2.0, threshold=0.8):
+    y_positions = []
+    page_occurrences = defaultdict(set)
+    for doc in documents:
+        page = doc.metadata.get("page", 0)
+        y = doc.metadata.get("bbox", [0, 0, 0, 0])[1]
+        y_positions.append(y)
+        page_occurrences[y].add(page)
+    clusters = legacy_cluster_positions(y_positions, tolerance)
+    return legacy_count_clusters(page_occurrences, clusters, tolerance, page_count * threshold)
+
+
+def legacy_detect_repeated_footer_positions(doc, documents, tolerance=2.0, threshold=0.8, bottom_ratio=0.9):
+    page_count = doc.page_count
+    y_positions = []
+    page_occurrences = defaultdict(set)
+    for doc_item in documents:
+        page_num = doc_item.metadata.get("page", 0)
+        page_idx = page_num - 1
+        if page_idx < 0 or page_idx >= page_count:
+            continue
+        page_height = doc[page_idx].rect.height
+        y_top = doc_item.metadata.get("bbox", [0, 0, 0, 0])[1]
+        if y_top >= page_height * bottom_ratio:
+            y_positions.append(y_top)
+            page_occurrences[y_top].add(page_num)
+    clusters = legacy_cluster_positions(y_positions, tolerance)
+    return legacy_count_clusters(page_occurrences, clusters, tolerance, page_count * threshold)
+
+
+def build_documents(pages, blocks, seed):
+    """
+    pages개 페이지의 합성 텍스트 블록 목록을 만듭니다.
+    """
+    rng = random.Random(seed)
+    documents = []
+
+    def add(page_num, y, text):
+        bbox = [72.0, y, 72.0 + 6.0 * len(text), y + 10.0]
+        documents.append(SyntheticDocument(text, {"page": page_num, "bbox": bbox}))
+
+    for page_num in range(1, pages + 1):
+        add(page_num, 36.0 + rng.uniform(-0.8, 0.8), "ACME INSURANCE POLICY")
+        add(page_num, 52.0 + rng.uniform(-0.4, 0.4), "Section header")
+        for _ in range(blocks):
+            add(page_num, rng.uniform(70.0, 740.0), "body text " * rng.randint(1, 8))
+        add(page_num, 770.0 + rng.uniform(-0.5, 0.5), f"Page {page_num} of {pages}")
+        add(page_num, 790.0 + rng.uniform(-1.5, 1.5), "Confidential")
+    return documents
+
+
+def legacy_filter(documents, remove_y_positions, tolerance=2.0):
+    return [d for d in documents
+            if not any(abs(round(d.metadata["bbox"][1], 1) - pos) < tolerance for pos in remove_y_positions)]
+
+
+def bisect_filter(documents, remove_y_positions, tolerance=2.0):
+    sorted_remove_y = sorted(remove_y_positions)
+    return [d for d in documents
+            if not near_any_position(sorted_remove_y, round(d.metadata["bbox"][1], 1), tolerance)]
+
+
+def measure(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="헤더/푸터 반복 위치 탐지 벤치마크")
+    parser.add_argument("--pages", type=int, default=500, help="합성 문서 페이지 수")
+    parser.add_argument("--blocks", type=int, default=40, help="페이지당 본문 블록 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    documents = build_documents(args.pages, args.blocks, args.seed)
+    doc = fitz.open()
+    for _ in range(args.pages):
+        doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page_count = args.pages
+    cases = [
+        ("common_y", lambda: legacy_detect_common_y_positions(documents, page_count),
+         lambda: detect_common_y_positions(documents, page_count)),
+        ("footer", lambda: legacy_detect_repeated_footer_positions(doc, documents),
+         lambda: detect_repeated_footer_positions(doc, documents)),
+    ]
+    print(f"합성 문서: {args.pages}페이지, 텍스트 블록 {len(documents)}개")
+    print(f"{'단계':<14} {'legacy(s)':>10} {'sweep(s)':>10} {'배율':>7}  제거 y 좌표")
+    remove_y_positions = set()
+    for name, legacy, current in cases:
+        legacy_time, expected = measure(legacy, args.repeat)
+        current_time, actual = measure(current, args.repeat)
+        if expected != actual:
+            raise AssertionError(f"결과 불일치: {name} {sorted(expected)} != {sorted(actual)}")
+        remove_y_positions |= actual
+        print(f"{name:<14} {legacy_time:>10.3f} {current_time:>10.3f} {legacy_time / current_time:>6.1f}x  "
+              f"{sorted(actual)}")
+
+    legacy_time, expected = measure(lambda: legacy_filter(documents, remove_y_positions), args.repeat)
+    current_time, actual = measure(lambda: bisect_filter(documents, remove_y_positions), args.repeat)
+    if expected != actual:
+        raise AssertionError("결과 불일치: filter")
+    print(f"{'filter':<14} {legacy_time:>10.3f} {current_time:>10.3f} {legacy_time / current_time:>6.1f}x  "
+          f"남은 블록 {len(actual)}개")
+
+
+if __name__ == "__main__":
+    main()
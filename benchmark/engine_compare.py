@@ -0,0 +1,83 @@
+# benchmark/engine_compare.py
+#
+# pdf2md 추출 엔진 비교 벤치마크 (pdfplumber vs pymupdf).
+# 문서마다 두 엔진의 변환 시간과 출력 차이(동일 페이지 수, 라인 단위 유사도)를 측정합니다.
+# 캐시는 사용하지 않습니다.
+#
+# 사용법: python benchmark/engine_compare.py [PDF 폴더 ...] [--json 결과.json] [--diff-dir 폴더]
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf2md import ENGINES, iter_pdf_pages_markdown  # noqa: E402
+
+
+def convert_pages(path, engine):
+    start = time.perf_counter()
+    pages = [markdown for _, markdown in iter_pdf_pages_markdown(path, workers=1, cache_mode="bypass", engine=engine)]
+    return pages, time.perf_counter() - start
+
+
+def compare_document(path, diff_dir=None):
+    results = {engine: convert_pages(path, engine) for engine in ENGINES}
+    base_pages, base_time = results["pdfplumber"]
+    fast_pages, fast_time = results["pymupdf"]
+    base_text = "\n---\n".join(base_pages)
+    fast_text = "\n---\n".join(fast_pages)
+    similarity = difflib.SequenceMatcher(None, base_text.splitlines(), fast_text.splitlines(),
+                                         autojunk=False).ratio()
+    identical_pages = sum(1 for a, b in zip(base_pages, fast_pages) if a == b)
+
+    if diff_dir:
+        os.makedirs(diff_dir, exist_ok=True)
+        diff = difflib.unified_diff(base_text.splitlines(), fast_text.splitlines(),
+                                    "pdfplumber", "pymupdf", lineterm="")
+        diff_path = os.path.join(diff_dir, os.path.splitext(os.path.basename(path))[0] + ".diff")
+        with open(diff_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(diff))
+
+    return {
+        "file": os.path.basename(path),
+        "pages": len(base_pages),
+        "pdfplumber_sec": round(base_time, 3),
+        "pymupdf_sec": round(fast_time, 3),
+        "speedup": round(base_time / fast_time, 2) if fast_time else None,
+        "identical_pages": identical_pages,
+        "line_similarity": round(similarity, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pdf2md 엔진 비교 벤치마크")
+    parser.add_argument("pdf_dirs", nargs="*", default=["pdf"])
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--diff-dir", help="문서별 unified diff를 저장할 폴더")
+    args = parser.parse_args()
+
+    paths = sorted(p for d in args.pdf_dirs for p in glob.glob(os.path.join(d, "*.pdf")))
+    rows = []
+    print(f"{'문서':<40} {'쪽':>4} {'pdfplumber':>11} {'pymupdf':>9} {'배속':>6} {'동일쪽':>6} {'유사도':>7}")
+    for path in paths:
+        row = compare_document(path, args.diff_dir)
+        rows.append(row)
+        print(f"{row['file'][:40]:<40} {row['pages']:>4} {row['pdfplumber_sec']:>10.2f}s {row['pymupdf_sec']:>8.2f}s "
+              f"{row['speedup']:>5}x {row['identical_pages']:>6} {row['line_similarity']:>7.3f}")
+
+    if rows:
+        total_base = sum(r["pdfplumber_sec"] for r in rows)
+        total_fast = sum(r["pymupdf_sec"] for r in rows)
+        print(f"합계: pdfplumber {total_base:.2f}s, pymupdf {total_fast:.2f}s ({total_base / total_fast:.1f}x)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmark/ocr_bench.py
+#
+# 스캔 페이지 OCR 처리량 벤치마크 (tesseract 필요).
+# 문서마다 지정한 페이지를 기존 방식(PNG 인코딩 후 Image.open, 직렬 tesseract)과
+# common.ocr.ocr_pages(원시 샘플 -> 이미지, tesseract 동시 실행)로 OCR하여 초당 페이지 수를 비교합니다.
+# 텍스트 레이어가 있는 페이지도 이미지로 렌더링하여 OCR하므로, 일반 PDF로도 측정할 수 있습니다.
+#
+# 사용법: python benchmark/ocr_bench.py [PDF 폴더 ...] [--pages 8] [--workers 1,2,4]
+#                                       [--dpi 300] [--lang eng] [--grayscale] [--json 결과.json]
+
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.ocr import ocr_pages  # noqa: E402
+
+
+def legacy_ocr(doc, indices, dpi, lang):
+    start = time.perf_counter()
+    for index in indices:
+        pix = doc[index].get_pixmap(dpi=dpi)
+        pytesseract.image_to_string(Image.open(io.BytesIO(pix.tobytes())), lang=lang)
+    return time.perf_counter() - start
+
+
+def pooled_ocr(doc, indices, dpi, lang, grayscale, workers):
+    start = time.perf_counter()
+    # 워커 수별 처리량을 비교하므로 OCR 캐시는 사용하지 않습니다.
+    ocr_pages(doc, indices, dpi=dpi, lang=lang, grayscale=grayscale, workers=workers, cache_mode="bypass")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 처리량 벤치마크")
+    parser.add_argument("pdf_dirs", nargs="*", default=["pdf"])
+    parser.add_argument("--pages", type=int, default=8, help="문서당 OCR할 페이지 수 (앞에서부터)")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="비교할 OCR 워커 수 목록")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--grayscale", action="store_true")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    worker_counts = sorted({int(w) for w in args.workers.split(",") if w})
+    paths = sorted(p for d in args.pdf_dirs for p in glob.glob(os.path.join(d, "*.pdf")))
+    print(f"tesseract {pytesseract.get_tesseract_version()}, dpi={args.dpi}, lang={args.lang}, "
+          f"grayscale={args.grayscale}")
+    rows = []
+    for path in paths:
+        with fitz.open(path) as doc:
+            indices = list(range(min(args.pages, doc.page_count)))
+            if not indices:
+                continue
+            row = {"file": os.path.basename(path), "pages": len(indices)}
+            legacy = legacy_ocr(doc, indices, args.dpi, args.lang)
+            row["legacy_pages_per_sec"] = round(len(indices) / legacy, 2)
+            for workers in worker_counts:
+                elapsed = pooled_ocr(doc, indices, args.dpi, args.lang, args.grayscale, workers)
+                row[f"workers_{workers}_pages_per_sec"] = round(len(indices) / elapsed, 2)
+        rows.append(row)
+        pooled = "  ".join(f"w{w}={row[f'workers_{w}_pages_per_sec']:.2f}" for w in worker_counts)
+        print(f"{row['file'][:40]:<40} {row['pages']:>3}쪽  기존={row['legacy_pages_per_sec']:.2f}  {pooled}  (pages/sec)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
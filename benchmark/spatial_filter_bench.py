@@ -0,0 +1,83 @@
+# benchmark/spatial_filter_bench.py
+#
+# 표 영역 단어 필터링 마이크로 벤치마크.
+# pdf/ 폴더의 문서에서 표가 많은 페이지를 골라 단어/표 bbox를 미리 추출해 두고,
+# 기존 파이썬 이중 루프(is_inside_bbox)와 common.spatial_filter의 벡터화 검사 시간을 비교합니다.
+#
+# 사용법: python benchmark/spatial_filter_bench.py [PDF 폴더] [--pages N] [--repeat N]
+
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.spatial_filter import word_centers_in_boxes  # noqa: E402
+from pdf2md import is_inside_bbox  # noqa: E402
+
+
+def legacy_filter(words, boxes):
+    result = []
+    for w in words:
+        cx = (float(w["x0"]) + float(w["x1"])) / 2
+        cy = (float(w["top"]) + float(w["bottom"])) / 2
+        inside_table = False
+        for bbox in boxes:
+            if is_inside_bbox(cx, cy, bbox):
+                inside_table = True
+                break
+        result.append(inside_table)
+    return result
+
+
+def collect_table_pages(pdf_dir, max_pages):
+    """
+    표가 있는 페이지의 (문서명, 페이지 번호, 단어 목록, 표 bbox 목록)을 표 개수가 많은 순으로 반환합니다.
+    """
+    samples = []
+    for path in sorted(glob.glob(os.path.join(pdf_dir, "*.pdf"))):
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                boxes = [table.bbox for table in page.find_tables()]
+                if boxes:
+                    samples.append((os.path.basename(path), page.page_number, page.extract_words(), boxes))
+                page.close()
+    samples.sort(key=lambda s: len(s[3]), reverse=True)
+    return samples[:max_pages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="표 영역 단어 필터링 벤치마크")
+    parser.add_argument("pdf_dir", nargs="?", default="pdf")
+    parser.add_argument("--pages", type=int, default=20, help="측정할 표 밀집 페이지 수")
+    parser.add_argument("--repeat", type=int, default=20, help="페이지별 반복 횟수")
+    args = parser.parse_args()
+
+    samples = collect_table_pages(args.pdf_dir, args.pages)
+    if not samples:
+        print("표가 있는 페이지를 찾지 못했습니다.")
+        return
+
+    total_legacy = total_vector = 0.0
+    print(f"{'문서':<40} {'페이지':>5} {'단어':>6} {'표':>4} {'legacy(ms)':>11} {'numpy(ms)':>10}")
+    for name, page_number, words, boxes in samples:
+        expected = legacy_filter(words, boxes)
+        actual = word_centers_in_boxes(words, boxes).tolist()
+        if expected != actual:
+            raise AssertionError(f"결과 불일치: {name} p.{page_number}")
+        legacy = timeit.timeit(lambda: legacy_filter(words, boxes), number=args.repeat) / args.repeat
+        vector = timeit.timeit(lambda: word_centers_in_boxes(words, boxes), number=args.repeat) / args.repeat
+        total_legacy += legacy
+        total_vector += vector
+        print(f"{name[:40]:<40} {page_number:>5} {len(words):>6} {len(boxes):>4} "
+              f"{legacy * 1000:>11.3f} {vector * 1000:>10.3f}")
+    print(f"합계: legacy {total_legacy * 1000:.3f} ms, numpy {total_vector * 1000:.3f} ms "
+          f"({total_legacy / total_vector:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmark/split_paragraph_bench.py
+#
+# /split 문단 분할(split_markdown_by_paragraph) 벤치마크.
+# 기존 구현(아래 legacy_split_markdown_by_paragraph, 줄마다 re.match + 표 뒤 빈 줄마다 앞으로 다시 훑는 방식)과
+# pdf2md의 단일 패스 스캐너를 수 MB 크기의 Markdown 입력으로 비교하고, 두 결과가 같은지 확인합니다.
+#   - document: 변환 결과와 비슷한 문서(문단/표/코드 블록 혼합)를 지정 크기까지 반복
+#   - blank-runs: 표 뒤에 긴 빈 줄 구간이 반복되는 문서 (기존 구현이 구간 길이의 제곱에 비례해 느려지는 경우)
+#   - stream: document 입력을 파일 스트림으로 넘겨 메모리에 전체 줄 목록을 만들지 않고 분할
+#
+# 사용법: python benchmark/split_paragraph_bench.py [--size-mb N] [--blank-run N] [--repeat N]
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf2md import iter_markdown_paragraphs, split_markdown_by_paragraph  # noqa: E402
+
+
+def legacy_split_markdown_by_paragraph(markdown_text):
+    """
+    기존 구현 그대로 (비교용)
+    """
+    lines = markdown_text.splitlines()
+    paragraphs = []
+    current_block = []
+    current_block_type = None  # "normal", "table", "code"
+    in_code_block = False
+    code_block_delimiter = None
+
+    def flush_block():
+        nonlocal current_block, current_block_type
+        if current_block:
+            block_text = "\n".join(current_block).strip()
+            if block_text:
+                paragraphs.append(block_text)
+            current_block = []
+            current_block_type = None
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        code_block_match = re.match(r'^(```+)', line)
+        if code_block_match:
+            delimiter = code_block_match.group(1)
+            if not in_code_block:
+                flush_block()
+                in_code_block = True
+                current_block_type = "code"
+                code_block_delimiter = delimiter
+            current_block.append(line)
+            if in_code_block and line.strip().endswith(code_block_delimiter) and i != 0:
+                flush_block()
+                in_code_block = False
+                code_block_delimiter = None
+            i += 1
+            continue
+
+        is_table_line = bool(re.match(r'^\s*\|', line))
+        if is_table_line:
+            if current_block_type != "table":
+                flush_block()
+                current_block_type = "table"
+            current_block.append(line)
+            i += 1
+            continue
+
+        if line.strip() == "":
+            if current_block_type == "table":
+                j = i + 1
+                found_table = False
+                while j < len(lines):
+                    if lines[j].strip():
+                        if re.match(r'^\s*\|', lines[j]):
+                            found_table = True
+                        break
+                    j += 1
+                if found_table:
+                    i += 1
+                    continue
+            flush_block()
+            i += 1
+            continue
+
+        if current_block_type != "normal":
+            flush_block()
+            current_block_type = "normal"
+        current_block.append(line)
+        i += 1
+
+    flush_block()
+    return paragraphs
+
+
+DOCUMENT_UNIT = """# 제1조 (보험금의 지급사유)
+회사는 피보험자에게 다음 중 어느 한 가지의 사유가 발생한 경우에는 보험수익자에게 약정한 보험금을 지급합니다.
+1. 보험기간 중 상해의 직접결과로써 사망한 경우
+
+| 구분 | 지급금액 | 비고 |
+| --- | --- | --- |
+| 사망 | 1,000만원 | 상해 |
+
+| 후유장해 | 가입금액 x 지급률 | 3% 이상 |
+
+```
+code sample line
+```
+Policy No. 1234-5678   Page 3 of 20
+---
+"""
+
+
+def build_document(size_bytes):
+    unit_size = len(DOCUMENT_UNIT.encode("utf-8"))
+    return DOCUMENT_UNIT * max(1, size_bytes // unit_size)
+
+
+def build_blank_runs(size_bytes, blank_run):
+    unit = "| a | b |\n| 1 | 2 |\n" + "\n" * blank_run + "본문 문단\n"
+    return unit * max(1, size_bytes // len(unit.encode("utf-8")))
+
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown 문단 분할 벤치마크")
+    parser.add_argument("--size-mb", type=float, default=4, help="입력 Markdown 크기 (MB)")
+    parser.add_argument("--blank-run", type=int, default=2000, help="blank-runs 입력의 표 뒤 빈 줄 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+    size_bytes = int(args.size_mb * 1024 * 1024)
+
+    inputs = [
+        ("document", build_document(size_bytes)),
+        ("blank-runs", build_blank_runs(size_bytes, args.blank_run)),
+    ]
+    print(f"{'입력':<12} {'크기(MB)':>9} {'문단':>8} {'legacy(s)':>10} {'scanner(s)':>11} {'배율':>7}")
+    for name, text in inputs:
+        legacy_time, expected = measure(lambda: legacy_split_markdown_by_paragraph(text), args.repeat)
+        scanner_time, actual = measure(lambda: split_markdown_by_paragraph(text), args.repeat)
+        if expected != actual:
+            raise AssertionError(f"결과 불일치: {name}")
+        size_mb = len(text.encode("utf-8")) / 1024 / 1024
+        print(f"{name:<12} {size_mb:>9.2f} {len(actual):>8} {legacy_time:>10.3f} {scanner_time:>11.3f} "
+              f"{legacy_time / scanner_time:>6.1f}x")
+
+    # 스트림 입력: 전체 문자열/줄 목록 없이 문단을 하나씩 처리
+    text = inputs[0][1]
+    expected = legacy_split_markdown_by_paragraph(text)
+    stream_time, count = measure(lambda: sum(1 for _ in iter_markdown_paragraphs(io.StringIO(text))), args.repeat)
+    if count != len(expected):
+        raise AssertionError("결과 불일치: stream")
+    print(f"{'stream':<12} {len(text.encode('utf-8')) / 1024 / 1024:>9.2f} {count:>8} {'-':>10} {stream_time:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
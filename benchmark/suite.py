@@ -0,0 +1,236 @@
+# benchmark/suite.py
+#
+# 변환 경로 전체 벤치마크.
+# pdf/ 폴더(및 추가로 지정한 폴더)의 PDF마다 각 변환 경로를 별도 프로세스에서 실행하여
+# 처리 시간, 초당 페이지 수, 최대 RSS, 단계별 시간(open/crop/find_tables/extract_words/grouping/rendering 등)을 측정합니다.
+# 변환/페이지 캐시는 사용하지 않습니다.
+#
+# 경로:
+#   pdf2md              pdf2md.process_pdf_to_markdown (pdfplumber 엔진)
+#   pdf2md.pymupdf      pdf2md.process_pdf_to_markdown (pymupdf 엔진)
+#   docx2md             docx2md.extract_combined_markdown
+#   pdf2docx2md         pdf2docx2md.extract_combined_markdown (pandoc 필요)
+#   loader.pdfplumber   loader/pdfplumber_loader.py
+#   loader.pypdf2       loader/pypdf2_loader.py
+#   loader.pdfminer     loader/pdfminer_loader.py
+#
+# 결과는 --json으로 저장하고, --baseline으로 이전 결과를 넘기면 경로별 총 처리 시간/최대 RSS가
+# 허용 비율(--max-slowdown, --max-rss-growth 또는 --thresholds 파일)을 넘을 때 종료 코드 1로 실패합니다.
+#
+# 사용법: python benchmark/suite.py [PDF 폴더 ...] [--paths 경로,...] [--repeat N]
+#                                   [--json 결과.json] [--baseline 이전결과.json]
+#                                   [--max-slowdown 0.2] [--max-rss-growth 0.25] [--thresholds 설정.json]
+#
+# --thresholds 파일 형식: {"default": {"wall": 0.2, "rss": 0.25}, "docx2md": {"wall": 0.5}}
+
+import argparse
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 경로 이름 -> (모듈, 함수, 키워드 인자)
+PATHS = {
+    "pdf2md": ("pdf2md", "process_pdf_to_markdown", {"workers": 1, "cache_mode": "bypass"}),
+    "pdf2md.pymupdf": ("pdf2md", "process_pdf_to_markdown",
+                       {"workers": 1, "cache_mode": "bypass", "engine": "pymupdf"}),
+    "docx2md": ("docx2md", "extract_combined_markdown", {}),
+    "pdf2docx2md": ("pdf2docx2md", "extract_combined_markdown", {}),
+    "loader.pdfplumber": ("loader.pdfplumber_loader", "load_pdf", {}),
+    "loader.pypdf2": ("loader.pypdf2_loader", "load_pdf", {}),
+    "loader.pdfminer": ("loader.pdfminer_loader", "load_pdf", {}),
+}
+
+
+def run_once(path_name, pdf_path):
+    """
+    (측정용 프로세스) 변환 경로 하나로 PDF 하나를 변환하고 측정값을 반환합니다.
+    모듈 import 시간은 처리 시간에서 제외하며, 최대 RSS에는 포함됩니다.
+    """
+    import resource
+
+    import fitz
+
+    from common.timing import record_stages
+
+    os.chdir(ROOT)
+    module_name, func_name, kwargs = PATHS[path_name]
+    func = getattr(importlib.import_module(module_name), func_name)
+    with fitz.open(pdf_path) as doc:
+        pages = doc.page_count
+
+    with record_stages() as stages:
+        start = time.perf_counter()
+        output = func(pdf_path, **kwargs)
+        wall = time.perf_counter() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "pages": pages,
+        "wall_sec": wall,
+        "peak_rss_mb": peak_rss_kb / 1024,
+        "output_chars": len(output or ""),
+        "stages": {name: round(seconds, 4) for name, (seconds, _) in sorted(stages.items())},
+    }
+
+
+def measure(path_name, pdf_path, repeat):
+    """
+    새 프로세스에서 repeat번 실행하여 가장 빠른 실행의 측정값(최대 RSS는 전체 최댓값)을 반환합니다.
+    """
+    best = None
+    peak_rss = 0.0
+    context = multiprocessing.get_context("spawn")
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                result = executor.submit(run_once, path_name, pdf_path).result()
+            except Exception as e:
+                return {"error": f"{type(e).__name__}: {e}".splitlines()[0]}
+        peak_rss = max(peak_rss, result["peak_rss_mb"])
+        if best is None or result["wall_sec"] < best["wall_sec"]:
+            best = result
+    best["peak_rss_mb"] = round(peak_rss, 1)
+    best["wall_sec"] = round(best["wall_sec"], 4)
+    best["pages_per_sec"] = round(best["pages"] / best["wall_sec"], 2) if best["wall_sec"] else None
+    return best
+
+
+def summarize(files):
+    """
+    파일별 측정값을 경로 단위 합계로 묶습니다. (실패한 파일은 제외)
+    """
+    ok = [r for r in files.values() if "error" not in r]
+    pages = sum(r["pages"] for r in ok)
+    wall = sum(r["wall_sec"] for r in ok)
+    stages = {}
+    for r in ok:
+        for name, seconds in r["stages"].items():
+            stages[name] = round(stages.get(name, 0.0) + seconds, 4)
+    return {
+        "files": len(ok),
+        "failed": len(files) - len(ok),
+        "pages": pages,
+        "wall_sec": round(wall, 4),
+        "pages_per_sec": round(pages / wall, 2) if wall else None,
+        "peak_rss_mb": max((r["peak_rss_mb"] for r in ok), default=None),
+        "stages": stages,
+    }
+
+
+def check_regressions(results, baseline, thresholds):
+    """
+    경로별 총 처리 시간/최대 RSS를 기준 결과와 비교하여 허용 비율을 넘은 항목 목록을 반환합니다.
+    두 결과 모두에서 성공한 파일만 비교합니다.
+    """
+    failures = []
+    default = thresholds.get("default", {})
+    for path_name, current in results.items():
+        base = baseline.get("results", {}).get(path_name)
+        if not base:
+            continue
+        limits = {**default, **thresholds.get(path_name, {})}
+        common = [name for name, r in current["files"].items()
+                  if "error" not in r and "error" not in base["files"].get(name, {"error": True})]
+        if not common:
+            continue
+        cur_wall = sum(current["files"][name]["wall_sec"] for name in common)
+        base_wall = sum(base["files"][name]["wall_sec"] for name in common)
+        if base_wall and cur_wall > base_wall * (1 + limits["wall"]):
+            failures.append(f"{path_name}: 처리 시간 {base_wall:.3f}s -> {cur_wall:.3f}s "
+                            f"(+{(cur_wall / base_wall - 1) * 100:.1f}%, 허용 {limits['wall'] * 100:.0f}%)")
+        cur_rss = max(current["files"][name]["peak_rss_mb"] for name in common)
+        base_rss = max(base["files"][name]["peak_rss_mb"] for name in common)
+        if base_rss and cur_rss > base_rss * (1 + limits["rss"]):
+            failures.append(f"{path_name}: 최대 RSS {base_rss:.1f}MB -> {cur_rss:.1f}MB "
+                            f"(+{(cur_rss / base_rss - 1) * 100:.1f}%, 허용 {limits['rss'] * 100:.0f}%)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="변환 경로 전체 벤치마크")
+    parser.add_argument("pdf_dirs", nargs="*", default=["pdf"])
+    parser.add_argument("--paths", default=",".join(PATHS), help="측정할 경로 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=1, help="파일별 반복 횟수 (가장 빠른 실행 사용)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일 경로")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="허용 처리 시간 증가 비율")
+    parser.add_argument("--max-rss-growth", type=float, default=0.25, help="허용 최대 RSS 증가 비율")
+    parser.add_argument("--thresholds", help="경로별 허용 비율 설정 JSON 파일")
+    args = parser.parse_args()
+
+    path_names = [name.strip() for name in args.paths.split(",") if name.strip()]
+    unknown = [name for name in path_names if name not in PATHS]
+    if unknown:
+        parser.error(f"알 수 없는 경로: {', '.join(unknown)} (선택 가능: {', '.join(PATHS)})")
+    pdf_paths = []
+    for pdf_dir in args.pdf_dirs:
+        pdf_paths.extend(sorted(glob.glob(os.path.join(os.path.abspath(pdf_dir), "*.pdf"))))
+    if not pdf_paths:
+        print("PDF 파일을 찾지 못했습니다.")
+        return 1
+
+    results = {}
+    print(f"{'경로':<18} {'문서':<32} {'페이지':>5} {'시간(s)':>9} {'페이지/s':>9} {'RSS(MB)':>8}")
+    for path_name in path_names:
+        files = {}
+        for pdf_path in pdf_paths:
+            name = os.path.relpath(pdf_path, ROOT)
+            result = measure(path_name, pdf_path, args.repeat)
+            files[name] = result
+            if "error" in result:
+                print(f"{path_name:<18} {os.path.basename(name)[:32]:<32} 실패: {result['error'][:80]}")
+            else:
+                print(f"{path_name:<18} {os.path.basename(name)[:32]:<32} {result['pages']:>5} "
+                      f"{result['wall_sec']:>9.3f} {result['pages_per_sec'] or 0:>9.2f} {result['peak_rss_mb']:>8.1f}")
+        results[path_name] = {"files": files, "total": summarize(files)}
+
+    print()
+    print(f"{'경로':<18} {'페이지':>6} {'시간(s)':>9} {'페이지/s':>9} {'RSS(MB)':>8}  단계별 시간(s)")
+    for path_name, result in results.items():
+        total = result["total"]
+        stages = ", ".join(f"{k}={v:.3f}" for k, v in sorted(total["stages"].items(), key=lambda kv: -kv[1]))
+        print(f"{path_name:<18} {total['pages']:>6} {total['wall_sec']:>9.3f} {total['pages_per_sec'] or 0:>9.2f} "
+              f"{total['peak_rss_mb'] or 0:>8.1f}  {stages}")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        thresholds = {"default": {"wall": args.max_slowdown, "rss": args.max_rss_growth}}
+        if args.thresholds:
+            with open(args.thresholds, encoding="utf-8") as f:
+                configured = json.load(f)
+            thresholds["default"].update(configured.pop("default", {}))
+            thresholds.update(configured)
+        failures = check_regressions(results, baseline, thresholds)
+        if failures:
+            print("\n성능 회귀:")
+            for failure in failures:
+                print(f"  - {failure}")
+            return 1
+        print("\n성능 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
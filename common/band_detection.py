@@ -0,0 +1,150 @@
+# common/band_detection.py
+
+import json
+import math
+import os
+import re
+from collections import defaultdict, namedtuple
+
+import fitz  # PyMuPDF
+
+from common.conversion_cache import ConversionCache, get_or_convert, make_cache_key
+from common.timing import stage
+from common.upload_source import open_fitz
+
+# 문서 단위 헤더/푸터 띠(band) 탐지 설정 (환경 변수로 조정 가능)
+# - BAND_SAMPLE_PAGES: 탐지에 사용할 표본 페이지 수 (문서 전체에 고르게 분포)
+# - BAND_SEARCH_RATIO: 반복 줄을 찾는 상단/하단 영역 (페이지 높이의 비율)
+# - BAND_MIN_REPEAT: 표본 페이지 중 이 비율 이상에서 같은 위치에 반복되는 줄만 헤더/푸터로 간주
+# - BAND_TOLERANCE: 같은 위치로 볼 y 좌표 허용 오차 (pt)
+BAND_SAMPLE_PAGES = int(os.environ.get("PDF2MD_BAND_SAMPLE_PAGES", "8"))
+BAND_SEARCH_RATIO = float(os.environ.get("PDF2MD_BAND_SEARCH_RATIO", "0.2"))
+BAND_MIN_REPEAT = float(os.environ.get("PDF2MD_BAND_MIN_REPEAT", "0.6"))
+BAND_TOLERANCE = float(os.environ.get("PDF2MD_BAND_TOLERANCE", "2.0"))
+
+# 페이지 크롭 방식
+# - "fixed": 서비스별 기존 규칙 (pdf2md는 고정 비율 크롭, docx2md는 추출 후 반복 y 좌표 필터)
+# - "detect": 표본 페이지에서 찾은 헤더/푸터 띠를 문서 전체 페이지에 크롭으로 적용 (추출 전에 잘라냄)
+CROP_MODES = ("fixed", "detect")
+
+# 잘라낼 상단/하단 띠 (페이지 높이의 비율)
+PageBands = namedtuple("PageBands", ["header_ratio", "footer_ratio"])
+
+NO_BANDS = PageBands(0.0, 0.0)
+
+# 문서 지문(업로드 바이트 해시 + 탐지 설정)별 탐지 결과 캐시
+band_cache = ConversionCache("page_bands")
+
+_DIGITS = re.compile(r"\d+")
+
+
+def band_clip(width, height, bands):
+    """
+    페이지 크기와 띠 비율로 남길 영역 (x0, top, x1, bottom)을 계산합니다.
+    """
+    return (0, height * bands.header_ratio, width, height * (1 - bands.footer_ratio))
+
+
+def sample_page_indices(page_count, samples=None):
+    """
+    문서 전체에 고르게 분포한 표본 페이지 인덱스(0부터 시작)를 반환합니다.
+    """
+    samples = BAND_SAMPLE_PAGES if samples is None else samples
+    if page_count <= samples:
+        return list(range(page_count))
+    if samples <= 1:
+        return [0]
+    return sorted({round(i * (page_count - 1) / (samples - 1)) for i in range(samples)})
+
+
+def _line_signature(text):
+    # 페이지 번호처럼 숫자만 바뀌는 줄을 같은 줄로 보기 위해 숫자를 하나의 기호로 바꿉니다.
+    return _DIGITS.sub("#", " ".join(text.split()).lower())
+
+
+def _zone_lines(page, top, bottom):
+    """
+    페이지의 [top, bottom] 영역에 완전히 포함된 텍스트 줄을 (서명, y0, y1) 목록으로 반환합니다.
+    """
+    lines = {}
+    clip = fitz.Rect(0, top, page.rect.width, bottom)
+    for _, y0, _, y1, word, block_no, line_no, _ in page.get_text("words", clip=clip):
+        entry = lines.get((block_no, line_no))
+        if entry is None:
+            lines[(block_no, line_no)] = [y0, y1, [word]]
+        else:
+            entry[0] = min(entry[0], y0)
+            entry[1] = max(entry[1], y1)
+            entry[2].append(word)
+    return [(_line_signature(" ".join(words)), y0, y1) for y0, y1, words in lines.values()
+            if y0 >= top and y1 <= bottom]
+
+
+def _repeated_ratios(occurrences, required, from_bottom=False):
+    """
+    서명별 출현 위치 [(페이지, y0, y1, 높이)]에서 required개 이상의 페이지에 같은 위치(허용 오차 이내)로
+    반복되는 줄의 (y0 비율, y1 비율) 목록을 반환합니다. from_bottom이면 위치를 페이지 하단 기준으로 비교합니다.
+    """
+    ratios = []
+    for entries in occurrences.values():
+        pages = {page for page, _, _, _ in entries}
+        if len(pages) < required:
+            continue
+        y_values = [height - y0 if from_bottom else y0 for _, y0, _, height in entries]
+        if max(y_values) - min(y_values) > BAND_TOLERANCE:
+            continue
+        ratios.extend((y0 / height, y1 / height) for _, y0, y1, height in entries)
+    return ratios
+
+
+def detect_bands_in_document(doc, samples=None):
+    """
+    열린 PyMuPDF 문서의 표본 페이지에서 상단/하단에 반복되는 줄(같은 텍스트, 같은 위치)을 찾아
+    헤더/푸터 띠(PageBands)를 반환합니다. 반복되는 줄이 없으면 해당 띠는 0입니다.
+    숫자만 다른 줄(페이지 번호 등)은 같은 줄로 봅니다.
+    """
+    indices = sample_page_indices(doc.page_count, samples)
+    if len(indices) < 2:
+        return NO_BANDS
+    required = max(2, math.ceil(len(indices) * BAND_MIN_REPEAT))
+    headers = defaultdict(list)
+    footers = defaultdict(list)
+    for index in indices:
+        page = doc[index]
+        height = page.rect.height
+        if height <= 0:
+            continue
+        for signature, y0, y1 in _zone_lines(page, 0, height * BAND_SEARCH_RATIO):
+            headers[signature].append((index, y0, y1, height))
+        for signature, y0, y1 in _zone_lines(page, height * (1 - BAND_SEARCH_RATIO), height):
+            footers[signature].append((index, y0, y1, height))
+
+    header_ratios = _repeated_ratios(headers, required)
+    footer_ratios = _repeated_ratios(footers, required, from_bottom=True)
+    header_ratio = max((y1 for _, y1 in header_ratios), default=0.0)
+    footer_ratio = max((1 - y0 for y0, _ in footer_ratios), default=0.0)
+    # 띠 경계에 걸친 글자가 남지 않도록 올림합니다.
+    return PageBands(math.ceil(header_ratio * 10000) / 10000, math.ceil(footer_ratio * 10000) / 10000)
+
+
+def detect_page_bands(pdf_source, samples=None, cache_mode="use"):
+    """
+    PDF(바이트 또는 파일 경로)의 헤더/푸터 띠를 탐지합니다.
+    결과는 문서 지문(바이트 해시 + 탐지 설정)별로 캐시하여, 같은 문서는 한 번만 탐지합니다.
+    """
+    samples = BAND_SAMPLE_PAGES if samples is None else samples
+    if isinstance(pdf_source, (bytes, bytearray)):
+        data = bytes(pdf_source)
+    else:
+        with open(pdf_source, "rb") as f:
+            data = f.read()
+    key = make_cache_key(data, scope="page_bands", samples=samples, search=BAND_SEARCH_RATIO,
+                         min_repeat=BAND_MIN_REPEAT, tolerance=BAND_TOLERANCE)
+
+    def detect():
+        with stage("band_detection"):
+            with open_fitz(data) as doc:
+                return json.dumps(detect_bands_in_document(doc, samples))
+
+    value, _ = get_or_convert(band_cache, key, detect, mode=cache_mode)
+    return PageBands(*json.loads(value))
@@ -0,0 +1,140 @@
+# common/batch.py
+
+import json
+import logging
+import os
+import zipfile
+from concurrent.futures import as_completed
+
+from common.metrics import flush_metrics
+from common.process_pool import spawn_process_pool
+
+# 일괄 변환(/convert/batch) 설정 (환경 변수로 조정 가능)
+# - BATCH_WORKERS: 파일 단위 병렬 변환 프로세스 수 (1 이하이면 직렬 처리)
+# - BATCH_MAX_FILES: 요청 하나에 담을 수 있는 최대 파일 수 (zip 내부 파일 포함)
+# - BATCH_MAX_BYTES: 요청 하나의 (압축 해제 후) 전체 파일 크기 상한
+BATCH_WORKERS = int(os.environ.get("PDF2MD_BATCH_WORKERS", "2"))
+BATCH_MAX_FILES = int(os.environ.get("PDF2MD_BATCH_MAX_FILES", "200"))
+BATCH_MAX_BYTES = int(os.environ.get("PDF2MD_BATCH_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def _skip_zip_entry(info):
+    """
+    디렉터리, macOS 메타데이터(__MACOSX/, ._*) 등 변환 대상이 아닌 zip 항목인지 확인합니다.
+    """
+    base = os.path.basename(info.filename)
+    return info.is_dir() or info.filename.startswith("__MACOSX/") or not base or base.startswith(".")
+
+
+def collect_batch_files(uploads, extensions, max_files=BATCH_MAX_FILES, max_bytes=BATCH_MAX_BYTES):
+    """
+    업로드된 파일 목록(FileStorage)을 읽어 변환할 항목 리스트를 만듭니다.
+    .zip 파일은 내부 항목으로 풀어서 추가합니다.
+    각 항목은 {"index", "file", "data"} dict이며, 지원하지 않는 형식이나 손상된 zip은
+    {"index", "file", "error"} 항목으로 남겨 다른 파일 변환에 영향을 주지 않습니다.
+    파일 수나 전체 크기가 상한을 넘으면 ValueError를 발생시킵니다.
+    """
+    items = []
+    total_bytes = 0
+
+    def add(name, data=None, error=None):
+        nonlocal total_bytes
+        if len(items) >= max_files:
+            raise ValueError(f"파일이 너무 많습니다. 요청당 최대 {max_files}개까지 변환할 수 있습니다.")
+        item = {"index": len(items), "file": name}
+        if error is not None:
+            item["error"] = error
+        elif os.path.splitext(name)[1].lower() not in extensions:
+            item["error"] = f"지원하지 않는 파일 형식입니다. ({', '.join(extensions)})"
+        else:
+            total_bytes += len(data)
+            if total_bytes > max_bytes:
+                raise ValueError(f"전체 파일 크기가 상한({max_bytes} bytes)을 넘었습니다.")
+            item["data"] = data
+        items.append(item)
+
+    for upload in uploads:
+        if not upload.filename:
+            continue
+        if not upload.filename.lower().endswith(".zip"):
+            add(upload.filename, upload.read())
+            continue
+        try:
+            with zipfile.ZipFile(upload.stream) as archive:
+                for info in archive.infolist():
+                    if _skip_zip_entry(info):
+                        continue
+                    name = f"{upload.filename}/{info.filename}"
+                    if os.path.splitext(name)[1].lower() not in extensions:
+                        add(name)
+                        continue
+                    # 압축 해제 전에 선언된 크기로 먼저 상한을 확인합니다.
+                    if total_bytes + info.file_size > max_bytes:
+                        raise ValueError(f"전체 파일 크기가 상한({max_bytes} bytes)을 넘었습니다.")
+                    add(name, archive.read(info))
+        except zipfile.BadZipFile as e:
+            add(upload.filename, error=f"zip 파일을 열 수 없습니다: {e}")
+    return items
+
+
+def _convert_in_worker(convert, *args):
+    # (프로세스 풀 워커) 변환한 뒤 워커에서 측정한 단계 시간을 메트릭 스냅샷에 쓰고 결과를 반환합니다.
+    try:
+        return convert(*args)
+    finally:
+        flush_metrics()
+
+
+def iter_batch_results(items, convert, args=(), workers=None):
+    """
+    collect_batch_files()의 항목들을 convert(파일 이름, data, *args)로 변환하여 끝나는 순서대로 결과 dict를 반환(yield)합니다.
+    성공: {"index", "file", **convert 결과 dict}, 실패: {"index", "file", "error"}
+    convert는 프로세스 풀로 넘길 수 있도록 모듈 최상위 함수여야 합니다.
+    """
+    workers = BATCH_WORKERS if workers is None else workers
+    pending = []
+    for item in items:
+        if "error" in item:
+            yield {"index": item["index"], "file": item["file"], "error": item["error"]}
+        else:
+            pending.append(item)
+    if not pending:
+        return
+
+    def failed(item, e):
+        logging.error("일괄 변환 실패 (%s): %s", item["file"], e)
+        return {"index": item["index"], "file": item["file"], "error": str(e)}
+
+    if workers <= 1 or len(pending) == 1:
+        for item in pending:
+            try:
+                result = convert(item["file"], item["data"], *args)
+            except Exception as e:
+                yield failed(item, e)
+            else:
+                yield {"index": item["index"], "file": item["file"], **result}
+        return
+
+    with spawn_process_pool(min(workers, len(pending))) as executor:
+        futures = {executor.submit(_convert_in_worker, convert, item["file"], item["data"], *args): item for item in pending}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                yield failed(item, e)
+            else:
+                yield {"index": item["index"], "file": item["file"], **result}
+
+
+def stream_batch_ndjson(items, convert, args=(), workers=None):
+    """
+    파일별 결과를 끝나는 대로 한 줄씩(NDJSON) 내보내고,
+    마지막에 요약 레코드 {"done": true, "files": 파일 수, "failed": 실패 수}를 내보냅니다.
+    """
+    failed = 0
+    for result in iter_batch_results(items, convert, args=args, workers=workers):
+        if "error" in result:
+            failed += 1
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+    yield json.dumps({"done": True, "files": len(items), "failed": failed}) + "\n"
@@ -0,0 +1,228 @@
+# common/conversion_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# 캐시 설정 (환경 변수로 조정 가능)
+# - CACHE_DIR: 모든 gunicorn 워커가 공유하는 디스크 캐시 디렉터리
+# - CACHE_MEMORY_ITEMS: 워커별 메모리(LRU) 캐시 항목 수 (0이면 메모리 캐시 사용 안 함)
+# - CACHE_DISK_MAX_BYTES: 디스크 캐시 최대 용량 (0이면 디스크 캐시 사용 안 함)
+# - CACHE_DISK_RESCAN_SECONDS: 디스크 캐시 디렉터리를 다시 훑어 사용량을 맞추는 주기.
+#   저장할 때마다 디렉터리를 훑지 않고 워커별 사용량 추정치만 갱신하며, 추정치가 최대 용량을 넘거나
+#   이 주기가 지났을 때만 전체를 훑어 (다른 워커가 쓴 항목까지 반영하여) 오래된 항목을 제거합니다.
+CACHE_DIR = os.environ.get("PDF2MD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "pdf2md_cache"))
+CACHE_MEMORY_ITEMS = int(os.environ.get("PDF2MD_CACHE_MEMORY_ITEMS", "64"))
+CACHE_DISK_MAX_BYTES = int(os.environ.get("PDF2MD_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_DISK_RESCAN_SECONDS = float(os.environ.get("PDF2MD_CACHE_DISK_RESCAN_SECONDS", "60"))
+
+# 요청별 캐시 사용 방식
+# - "use": 캐시를 조회하고, 없으면 변환 후 저장 (기본값)
+# - "bypass": 캐시를 조회하지도 저장하지도 않음
+# - "refresh": 캐시를 조회하지 않고 새로 변환한 결과로 덮어씀
+CACHE_MODES = ("use", "bypass", "refresh")
+
+
+def make_cache_key(data, **options):
+    """
+    업로드 바이트의 해시와 변환 옵션(엔진, 설정값 등)을 합쳐 캐시 키(hex 문자열)를 만듭니다.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    option_text = json.dumps(options, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{digest}:{option_text}".encode("utf-8")).hexdigest()
+
+
+class ConversionCache:
+    """
+    변환 결과(문자열)를 저장하는 2단계 캐시.
+    - 1단계: 프로세스 내 LRU 메모리 캐시 (memory_items 개까지)
+    - 2단계: 여러 워커가 공유하는 디스크 캐시 (disk_max_bytes 까지, 오래 사용되지 않은 항목부터 제거)
+    """
+
+    def __init__(self, name, memory_items=CACHE_MEMORY_ITEMS, disk_dir=CACHE_DIR,
+                 disk_max_bytes=CACHE_DISK_MAX_BYTES):
+        self.name = name
+        self.memory_items = memory_items
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir and disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._disk_bytes = None  # 디스크 사용량 추정치 (None이면 아직 훑지 않음)
+        self._disk_scanned_at = 0.0
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _remember(self, key, value):
+        if self.memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+                self._stats["memory_evictions"] += 1
+
+    def get(self, key):
+        """
+        캐시된 값을 반환합니다. 없으면 None을 반환합니다.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["memory_hits"] += 1
+                return self._memory[key]
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = f.read()
+                # 최근 사용 시각을 갱신하여 디스크 eviction 순서에 반영
+                os.utime(path, None)
+            except OSError:
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                self._remember(key, value)
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key, value):
+        """
+        값을 메모리 캐시와 디스크 캐시에 저장합니다.
+        """
+        self._remember(key, value)
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        data = value.encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            # 다른 워커가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._account_disk(len(data) - replaced)
+        except OSError as e:
+            logging.warning("디스크 캐시 저장 실패 (%s): %s", self.name, e)
+
+    def _account_disk(self, delta):
+        # 사용량 추정치를 갱신하고, 최대 용량을 넘었거나 재확인 주기가 지났을 때만 디렉터리를 훑습니다.
+        with self._lock:
+            stale = (self._disk_bytes is None
+                     or time.monotonic() - self._disk_scanned_at >= CACHE_DISK_RESCAN_SECONDS)
+            if not stale:
+                self._disk_bytes += delta
+            if not stale and self._disk_bytes <= self.disk_max_bytes:
+                return
+        self._evict_disk()
+
+    def _iter_disk_entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for file_name in files:
+                if file_name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _evict_disk(self):
+        """
+        디스크 캐시 디렉터리를 훑어 실제 사용량으로 추정치를 맞추고, 최대 용량을 넘으면
+        가장 오래 사용되지 않은 항목부터 최대 용량의 90%까지 제거합니다.
+        (여유를 두어, 가득 찬 캐시에서도 저장할 때마다 다시 훑지 않게 합니다. 다른 스레드가 훑는 중이면 건너뜀)
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            entries = list(self._iter_disk_entries())
+            total = sum(size for _, size, _ in entries)
+            if total > self.disk_max_bytes:
+                target = self.disk_max_bytes * 0.9
+                for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    with self._lock:
+                        self._stats["disk_evictions"] += 1
+            with self._lock:
+                self._disk_bytes = total
+                self._disk_scanned_at = time.monotonic()
+        finally:
+            self._evict_lock.release()
+
+    def stats(self):
+        """
+        현재 워커의 hit/miss/eviction 통계와 캐시 사용량을 반환합니다.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_items"] = len(self._memory)
+        if self.disk_dir:
+            entries = list(self._iter_disk_entries())
+            stats["disk_items"] = len(entries)
+            stats["disk_bytes"] = sum(size for _, size, _ in entries)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.disk_dir:
+            for path, _, _ in list(self._iter_disk_entries()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+            with self._lock:
+                self._disk_bytes = 0
+                self._disk_scanned_at = time.monotonic()
+
+
+def get_or_convert(cache, key, convert, mode="use"):
+    """
+    캐시 모드에 따라 캐시를 조회하거나 convert()를 호출하여 결과를 반환합니다.
+    반환값: (결과 문자열, 캐시 적중 여부)
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"지원하지 않는 cache 모드입니다. {', '.join(CACHE_MODES)} 중 선택 가능.")
+    if mode == "use":
+        value = cache.get(key)
+        if value is not None:
+            return value, True
+    value = convert()
+    if mode != "bypass":
+        cache.set(key, value)
+    return value, False
@@ -0,0 +1,287 @@
+# common/jobs.py
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+
+from common.metrics import flush_metrics
+from common.process_pool import spawn_process_pool
+
+# 비동기 변환 작업 설정 (환경 변수로 조정 가능)
+# - JOBS_DIR: 작업 DB(SQLite)와 업로드 파일을 보관하는 디렉터리 (모든 gunicorn 워커가 공유)
+# - JOB_WORKERS: gunicorn 워커 하나당 백그라운드 변환 프로세스 수
+# - JOB_STALE_SECONDS: 이 시간 동안 진행 상황 갱신이 없는 "running" 작업은 다시 대기열로 되돌림
+# - JOB_RETENTION_SECONDS: 끝난 작업(결과 포함)을 보관하는 시간
+JOBS_DIR = os.environ.get("PDF2MD_JOBS_DIR", os.path.join(tempfile.gettempdir(), "pdf2md_jobs"))
+JOB_WORKERS = int(os.environ.get("PDF2MD_JOB_WORKERS", "2"))
+JOB_STALE_SECONDS = int(os.environ.get("PDF2MD_JOB_STALE_SECONDS", "600"))
+JOB_RETENTION_SECONDS = int(os.environ.get("PDF2MD_JOB_RETENTION_SECONDS", str(24 * 60 * 60)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    input_path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    pages_total INTEGER,
+    result TEXT,
+    error TEXT,
+    claim TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """
+    SQLite 파일 하나로 관리하는 로컬 영속 작업 대기열.
+    상태: queued -> running -> done / failed
+    여러 프로세스가 동시에 접근해도 claim_next()는 작업 하나를 한 곳에만 배정합니다.
+    배정할 때마다 새 claim 토큰을 발급하며, 진행 상황/결과 기록은 그 토큰이 아직 유효할 때만 반영됩니다.
+    (오래 멈춘 작업이 다시 대기열에 들어간 뒤 이전 실행이 뒤늦게 끝나도 새 실행의 상태를 덮어쓰지 않습니다)
+    """
+
+    def __init__(self, base_dir=JOBS_DIR):
+        self.base_dir = base_dir
+        self.db_path = os.path.join(base_dir, "jobs.sqlite3")
+        self.upload_dir = os.path.join(base_dir, "uploads")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "claim" not in columns:
+                # claim 열이 없던 이전 버전의 대기열 파일
+                conn.execute("ALTER TABLE jobs ADD COLUMN claim TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, data, suffix, options):
+        """
+        업로드 바이트를 스풀 디렉터리에 저장하고 작업을 대기열에 넣은 뒤 작업 ID를 반환합니다.
+        """
+        job_id = uuid.uuid4().hex
+        input_path = os.path.join(self.upload_dir, job_id + suffix)
+        with open(input_path, "wb") as f:
+            f.write(data)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, input_path, options) "
+                "VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, now, now, input_path, json.dumps(options)),
+            )
+        return job_id
+
+    def claim_next(self):
+        """
+        가장 오래된 대기 작업 하나를 running 상태로 바꾸고 (작업 ID, claim 토큰)을 반환합니다. 없으면 None.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            claim = uuid.uuid4().hex
+            conn.execute("UPDATE jobs SET status = 'running', claim = ?, updated_at = ? WHERE id = ?",
+                         (claim, time.time(), row["id"]))
+            conn.execute("COMMIT")
+            return row["id"], claim
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id, include_result=True):
+        """
+        작업 정보를 dict로 반환합니다. 없으면 None.
+        """
+        columns = "id, status, created_at, updated_at, input_path, options, pages_done, pages_total, error, claim"
+        if include_result:
+            columns += ", result"
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        return job
+
+    def update_progress(self, job_id, claim, pages_done, pages_total):
+        """
+        claim 토큰이 아직 유효한 running 작업의 진행 상황을 기록합니다. 기록했으면 True를 반환합니다.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET pages_done = ?, pages_total = ?, updated_at = ? "
+                "WHERE id = ? AND claim = ? AND status = 'running'",
+                (pages_done, pages_total, time.time(), job_id, claim),
+            )
+            return cursor.rowcount > 0
+
+    def _complete(self, job_id, claim, status, result=None, error=None):
+        # claim 토큰이 바뀐(다시 배정된) 작업이면 아무것도 기록하지 않고, 새 실행이 쓸 입력 파일도 지우지 않습니다.
+        job = self.get(job_id, include_result=False)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? "
+                "WHERE id = ? AND claim = ? AND status = 'running'",
+                (status, result, error, time.time(), job_id, claim),
+            )
+        if cursor.rowcount == 0:
+            logging.warning("다시 배정된 작업의 이전 실행 결과를 버립니다: %s", job_id)
+            return False
+        if job and os.path.exists(job["input_path"]):
+            os.remove(job["input_path"])
+        return True
+
+    def finish(self, job_id, claim, result):
+        return self._complete(job_id, claim, "done", result=result)
+
+    def fail(self, job_id, claim, error):
+        return self._complete(job_id, claim, "failed", error=error)
+
+    def requeue_stale(self, max_age=JOB_STALE_SECONDS):
+        """
+        진행 상황 갱신이 max_age초 이상 없는 running 작업(처리하던 프로세스가 죽은 경우 등)을 다시 대기시킵니다.
+        claim 토큰을 지우므로, 이전 실행이 아직 살아 있더라도 그 진행 상황/결과는 더 이상 기록되지 않습니다.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'queued', pages_done = 0, claim = NULL, updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ?",
+                (time.time(), time.time() - max_age),
+            )
+            return cursor.rowcount
+
+    def purge(self, max_age=JOB_RETENTION_SECONDS):
+        """
+        끝난 지 max_age초가 지난 작업을 삭제합니다.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - max_age,),
+            )
+            return cursor.rowcount
+
+
+def _execute_job(run_job, base_dir, job_id, claim):
+    """
+    (백그라운드 프로세스) run_job(queue, job_id, job)을 실행하고 결과/오류를 대기열에 기록합니다.
+    job["claim"]은 이 실행의 claim 토큰입니다 (진행 상황 기록용).
+    """
+    queue = JobQueue(base_dir)
+    job = queue.get(job_id, include_result=False)
+    if job is None or job["claim"] != claim:
+        # 제출 후 실행되기 전에 다시 배정되었거나 삭제된 작업
+        return
+    try:
+        result = run_job(queue, job_id, job)
+    except Exception as e:
+        logging.exception("작업 실패: %s", job_id)
+        queue.fail(job_id, claim, str(e))
+    else:
+        queue.finish(job_id, claim, result)
+    finally:
+        flush_metrics()
+
+
+class JobDispatcher:
+    """
+    대기열에서 작업을 꺼내 제한된 크기의 백그라운드 프로세스 풀에서 실행하는 디스패처 스레드.
+    HTTP 워커는 작업을 넣기만 하고 바로 응답하므로, 오래 걸리는 변환도 타임아웃 없이 끝까지 진행됩니다.
+    run_job(queue, job_id, job)은 모듈 최상위 함수여야 합니다(프로세스로 전달).
+    """
+
+    def __init__(self, queue, run_job, workers=JOB_WORKERS, poll_interval=1.0):
+        self.queue = queue
+        self.run_job = run_job
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._slots = threading.Semaphore(self.workers)
+
+    def start(self):
+        """
+        디스패처 스레드를 (아직 없다면) 시작합니다.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="job-dispatcher", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """
+        새 작업이 들어왔음을 알려 다음 폴링을 기다리지 않고 바로 확인하게 합니다.
+        """
+        self._wakeup.set()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # 스레드가 있는 프로세스에서 fork하지 않도록 spawn 방식으로 워커를 만듭니다.
+            self._executor = spawn_process_pool(self.workers)
+        return self._executor
+
+    def _loop(self):
+        last_maintenance = 0.0
+        while True:
+            if time.time() - last_maintenance > 60:
+                try:
+                    self.queue.requeue_stale()
+                    self.queue.purge()
+                except Exception:
+                    logging.exception("작업 대기열 정리 실패")
+                last_maintenance = time.time()
+
+            self._slots.acquire()
+            try:
+                claimed = self.queue.claim_next()
+            except Exception:
+                logging.exception("작업 대기열 조회 실패")
+                claimed = None
+            if claimed is None:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            job_id, claim = claimed
+            try:
+                future = self._get_executor().submit(_execute_job, self.run_job, self.queue.base_dir, job_id, claim)
+            except Exception as e:
+                self._slots.release()
+                self._executor = None
+                self.queue.fail(job_id, claim, str(e))
+                continue
+            future.add_done_callback(lambda f, job_id=job_id, claim=claim: self._on_done(f, job_id, claim))
+
+    def _on_done(self, future, job_id, claim):
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            # 워커 프로세스가 비정상 종료된 경우 등: 작업을 실패로 기록하고 풀을 새로 만듭니다.
+            logging.error("작업 실행 프로세스 오류 (%s): %s", job_id, error)
+            if isinstance(error, BrokenProcessPool):
+                self._executor = None
+            self.queue.fail(job_id, claim, str(error))
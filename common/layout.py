@@ -0,0 +1,74 @@
+# common/layout.py
+
+from operator import attrgetter
+
+# 페이지 요소 정렬 키: y 좌표 (동률이면 기존 순서 유지) / (y, x) 좌표
+BY_Y = attrgetter("y")
+BY_Y_X = attrgetter("y", "x")
+
+
+class TextBlock:
+    """
+    페이지의 텍스트 요소 (라인, 문단, OCR 결과 등).
+    좌표는 PDF 좌표계(위쪽이 작은 y)이며, 글꼴 정보가 없는 추출기는 기본값을 사용합니다.
+    """
+    __slots__ = ("x", "y", "content", "font_size", "font_weight", "font_color", "bg_color")
+    kind = "text"
+
+    def __init__(self, x, y, content, font_size=0, font_weight="normal", font_color="#000000", bg_color="#FFFFFF"):
+        self.x = x
+        self.y = y
+        self.content = content
+        self.font_size = font_size
+        self.font_weight = font_weight
+        self.font_color = font_color
+        self.bg_color = bg_color
+
+    def __repr__(self):
+        return f"TextBlock(x={self.x!r}, y={self.y!r}, content={self.content[:30]!r})"
+
+
+class TableBlock:
+    """
+    페이지의 표 요소. content는 Markdown 표 문자열, bbox는 (x0, top, x1, bottom),
+    header는 첫 행의 텍스트(본문에 중복된 표 헤더를 찾을 때 사용)입니다.
+    """
+    __slots__ = ("x", "y", "content", "bbox", "header")
+    kind = "table"
+
+    def __init__(self, x, y, content, bbox=None, header=None):
+        self.x = x
+        self.y = y
+        self.content = content
+        self.bbox = bbox
+        self.header = header
+
+    @classmethod
+    def from_bbox(cls, bbox, content, header=None):
+        bbox = tuple(bbox)
+        return cls(bbox[0], bbox[1], content, bbox, header)
+
+    def __repr__(self):
+        return f"TableBlock(x={self.x!r}, y={self.y!r}, bbox={self.bbox!r})"
+
+
+class Page:
+    """
+    한 페이지의 레이아웃: 페이지 번호(1부터 시작)와 TextBlock/TableBlock 목록.
+    추출기(pdf2md, docx2md)가 만들고 Markdown 렌더러가 소비합니다.
+    """
+    __slots__ = ("number", "blocks")
+
+    def __init__(self, number, blocks=None):
+        self.number = number
+        self.blocks = [] if blocks is None else blocks
+
+    def sorted_blocks(self, key=BY_Y):
+        """
+        key(기본값: y 좌표) 기준으로 안정 정렬한 요소 목록을 반환합니다.
+        """
+        return sorted(self.blocks, key=key)
+
+    def __repr__(self):
+        return f"Page(number={self.number!r}, blocks={len(self.blocks)})"
+
@@ -0,0 +1,372 @@
+# common/metrics.py
+
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from flask import Response, g, request
+
+from common.timing import add_stage_sink
+
+# Prometheus 형식 메트릭 설정 (환경 변수로 조정 가능)
+# - METRICS_ENABLED: "1"이면 요청/단계 메트릭을 수집하고 /metrics로 노출 (기본값: 사용 안 함)
+# - METRICS_DIR: 워커(프로세스)별 메트릭 스냅샷 파일을 두는 디렉터리. /metrics는 같은 서비스의
+#   모든 gunicorn 워커 파일을 합산하여 응답하므로 워커들이 같은 디렉터리를 공유해야 합니다.
+#   종료된 프로세스(pid가 더 이상 없는)의 스냅샷은 /metrics 요청 때 retired.json 하나로 합쳐 정리합니다.
+# 꺼져 있으면 요청 훅을 등록하지 않고, 단계 측정(common.timing)도 켜지 않으며,
+# record_pages()/record_error()는 전역 변수 하나만 확인하고 돌아갑니다.
+METRICS_ENABLED = os.environ.get("PDF2MD_METRICS", "0") == "1"
+METRICS_DIR = os.environ.get("PDF2MD_METRICS_DIR", os.path.join(tempfile.gettempdir(), "pdf2md_metrics"))
+
+METRIC_PREFIX = "pdf2md"
+
+# 히스토그램 버킷 (초)
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_HELP = {
+    "requests_total": ("counter", "처리한 HTTP 요청 수"),
+    "request_duration_seconds": ("histogram", "요청 처리 시간 (스트리밍 응답은 전송 완료까지)"),
+    "request_bytes_total": ("counter", "요청 본문 바이트 수"),
+    "response_bytes_total": ("counter", "응답 본문 바이트 수"),
+    "pages_total": ("counter", "변환 대상 페이지 수"),
+    "cache_results_total": ("counter", "변환 결과 캐시 적중/미스 수 (X-Cache 헤더 기준)"),
+    "errors_total": ("counter", "변환 오류 수 (예외 클래스별)"),
+    "stage_duration_seconds": ("histogram", "변환 단계별 소요 시간"),
+}
+
+# 종료된 프로세스들의 누적값을 합쳐 두는 스냅샷 파일 (합산 결과가 줄어들지 않도록 지우지 않고 합칩니다)
+RETIRED_SNAPSHOT = "retired.json"
+
+_registry = None  # 이 프로세스의 MetricsRegistry (꺼져 있으면 None)
+
+
+class MetricsRegistry:
+    """
+    한 프로세스의 카운터/히스토그램 값을 모으고, METRICS_DIR/<서비스>/ 아래
+    프로세스별 JSON 스냅샷 파일로 내려 씁니다. 읽는 쪽(render_metrics)이 모든 스냅샷을 합산합니다.
+    """
+
+    def __init__(self, service, base_dir=None):
+        self.service = service
+        self.directory = os.path.join(base_dir or METRICS_DIR, service)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # fork된 자식 프로세스는 부모 값을 이어받지 않고 자기 파일을 새로 씁니다.
+        # 파일 이름에 임의 토큰을 붙여, 재시작한 워커가 같은 pid를 받아도 이전 워커의 누적값을 덮어쓰지 않게 합니다.
+        self._pid = os.getpid()
+        self.path = os.path.join(self.directory, f"{self._pid}-{uuid.uuid4().hex[:8]}.json")
+        self.counters = {}
+        self.histograms = {}
+
+    def _check_pid(self):
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_pid()
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_pid()
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = {"buckets": list(buckets), "counts": [0] * (len(buckets) + 1),
+                                                "sum": 0.0, "count": 0}
+            index = len(buckets)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    index = i
+                    break
+            entry["counts"][index] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def flush(self):
+        """
+        현재 값을 이 프로세스의 스냅샷 파일에 원자적으로(임시 파일 + 이름 바꾸기) 씁니다.
+        """
+        with self._lock:
+            self._check_pid()
+            _write_snapshot(self.path, self.counters, self.histograms)
+
+    def stage_sink(self, name, seconds):
+        self.observe("stage_duration_seconds", {"service": self.service, "stage": name}, seconds, STAGE_BUCKETS)
+
+
+def _write_snapshot(path, counters, histograms):
+    # 스냅샷 파일을 원자적으로(임시 파일 + 이름 바꾸기) 씁니다.
+    snapshot = {
+        "counters": [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        "histograms": [[name, dict(labels), entry] for (name, labels), entry in histograms.items()],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # 다른 워커가 쓰는 중이거나 지워진 파일
+
+
+def _merge_snapshot(counters, histograms, snapshot):
+    for name, labels, value in snapshot.get("counters", []):
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, entry in snapshot.get("histograms", []):
+        key = (name, tuple(sorted(labels.items())))
+        merged = histograms.get(key)
+        if merged is None:
+            histograms[key] = {"buckets": entry["buckets"], "counts": list(entry["counts"]),
+                               "sum": entry["sum"], "count": entry["count"]}
+        else:
+            merged["counts"] = [a + b for a, b in zip(merged["counts"], entry["counts"])]
+            merged["sum"] += entry["sum"]
+            merged["count"] += entry["count"]
+
+
+def load_snapshots(directory):
+    """
+    디렉터리의 모든 프로세스 스냅샷을 읽어 (counters, histograms)로 합산합니다.
+    """
+    counters = {}
+    histograms = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        snapshot = _read_snapshot(os.path.join(directory, filename))
+        if snapshot is not None:
+            _merge_snapshot(counters, histograms, snapshot)
+    return counters, histograms
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 다른 사용자의 프로세스
+    return True
+
+
+def _snapshot_pid(filename):
+    # "<pid>-<토큰>.json" 또는 "<pid>-<토큰>.json.tmp" 형식의 파일 이름에서 pid를 꺼냅니다. (그 외 파일은 None)
+    pid, sep, _ = filename.partition("-")
+    if not sep or not pid.isdigit() or not filename.endswith((".json", ".json.tmp")):
+        return None
+    return int(pid)
+
+
+def prune_snapshots(directory):
+    """
+    종료된 프로세스(pid가 없는)의 스냅샷을 retired.json에 합치고 지웁니다. 정리한 파일 수를 반환합니다.
+    합산 결과는 정리 전과 같으며, 워커가 재시작하거나 작업 프로세스가 끝날 때마다 파일이 쌓이지 않습니다.
+    여러 워커가 동시에 정리하지 않도록 디렉터리의 잠금 파일로 직렬화합니다.
+    """
+    with open(os.path.join(directory, ".lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = []
+        for filename in os.listdir(directory):
+            pid = _snapshot_pid(filename)
+            if pid is not None and pid != os.getpid() and not _pid_alive(pid):
+                dead.append(filename)
+        if not dead:
+            return 0
+        retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+        counters = {}
+        histograms = {}
+        for filename in [RETIRED_SNAPSHOT] + [name for name in dead if name.endswith(".json")]:
+            snapshot = _read_snapshot(os.path.join(directory, filename))
+            if snapshot is not None:
+                _merge_snapshot(counters, histograms, snapshot)
+        _write_snapshot(retired_path, counters, histograms)
+        for filename in dead:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+        return len(dead)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render_metrics(directory):
+    """
+    합산한 메트릭을 Prometheus 텍스트 노출 형식(text/plain; version=0.0.4)으로 만듭니다.
+    """
+    counters, histograms = load_snapshots(directory)
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append(("counter", labels, value))
+    for (name, labels), entry in histograms.items():
+        by_name.setdefault(name, []).append(("histogram", labels, entry))
+
+    lines = []
+    for name in sorted(by_name):
+        full_name = f"{METRIC_PREFIX}_{name}"
+        metric_type, help_text = _HELP.get(name, (by_name[name][0][0], name))
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        for kind, labels, value in sorted(by_name[name], key=lambda item: item[1]):
+            if kind == "counter":
+                lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(value["buckets"] + ["+Inf"], value["counts"]):
+                cumulative += count
+                bucket_labels = labels + (("le", bound if bound == "+Inf" else repr(float(bound))),)
+                lines.append(f"{full_name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(float(value['sum']))}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _request_labels():
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    return {"service": _registry.service, "endpoint": endpoint}
+
+
+def flush_metrics():
+    """
+    이 프로세스의 메트릭을 스냅샷 파일에 씁니다. 메트릭이 꺼져 있으면 아무 일도 하지 않습니다.
+    요청을 처리하지 않는 프로세스(프로세스 풀 워커 등)는 결과를 돌려주기 전에 호출해야
+    그 안에서 측정한 단계 시간이 /metrics에 반영됩니다.
+    """
+    if _registry is not None:
+        _registry.flush()
+
+
+def record_pages(count):
+    """
+    현재 요청에서 변환하는 페이지 수를 기록합니다. 메트릭이 꺼져 있으면 아무 일도 하지 않습니다.
+    """
+    if _registry is None or not count:
+        return
+    _registry.inc("pages_total", _request_labels(), count)
+
+
+def record_error(error):
+    """
+    현재 요청에서 처리한(응답으로 바꾼) 예외의 클래스를 기록합니다. 메트릭이 꺼져 있으면 아무 일도 하지 않습니다.
+    """
+    if _registry is None:
+        return
+    _registry.inc("errors_total", dict(_request_labels(), error=type(error).__name__))
+
+
+class _CountingBody:
+    """
+    스트리밍 응답 본문을 감싸 전송한 바이트 수를 세고, 전송이 끝나면(close) 요청 메트릭을 기록합니다.
+    """
+
+    def __init__(self, body, finish):
+        self._body = body
+        self._finish = finish
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self._body:
+            self.size += len(chunk) if isinstance(chunk, bytes) else len(chunk.encode("utf-8"))
+            yield chunk
+
+    def close(self):
+        close = getattr(self._body, "close", None)
+        if close is not None:
+            close()
+        self._finish(self.size)
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    if request.url_rule is not None and request.url_rule.endpoint == "metrics":
+        return response
+    start = g.get("metrics_start")
+    if start is None:
+        return response
+    registry = _registry
+    labels = _request_labels()
+    status = str(response.status_code)
+    bytes_in = request.content_length or 0
+    cache = response.headers.get("X-Cache")
+
+    def finish(bytes_out):
+        registry.inc("requests_total", dict(labels, status=status))
+        registry.observe("request_duration_seconds", labels, time.perf_counter() - start, REQUEST_BUCKETS)
+        registry.inc("request_bytes_total", labels, bytes_in)
+        registry.inc("response_bytes_total", labels, bytes_out)
+        if cache:
+            registry.inc("cache_results_total", dict(labels, result=cache))
+        registry.flush()
+
+    if response.is_streamed:
+        # 스트리밍 응답은 본문 전송이 끝났을 때 시간/바이트를 기록합니다.
+        body = _CountingBody(response.response, finish)
+        response.response = body
+    else:
+        finish(response.calculate_content_length() or 0)
+    return response
+
+
+def _teardown_request(error):
+    # 엔드포인트가 처리하지 못한 예외 (Flask가 500으로 응답)
+    if error is not None and _registry is not None:
+        _registry.inc("errors_total", dict(_request_labels(), error=type(error).__name__))
+
+
+def install_metrics(app, service):
+    """
+    Flask 앱에 /metrics 엔드포인트를 추가하고, 메트릭이 켜져 있으면(PDF2MD_METRICS=1)
+    요청 훅과 단계 시간 싱크를 등록합니다. service는 메트릭 레이블과 스냅샷 디렉터리 이름으로 쓰입니다.
+    """
+    global _registry
+    directory = os.path.join(METRICS_DIR, service)
+
+    @app.route("/metrics", methods=["GET"], endpoint="metrics")
+    def metrics_endpoint():
+        if _registry is None:
+            return Response("metrics disabled (set PDF2MD_METRICS=1)\n", status=404, mimetype="text/plain")
+        _registry.flush()
+        prune_snapshots(directory)
+        return Response(render_metrics(directory), mimetype="text/plain; version=0.0.4")
+
+    if not METRICS_ENABLED:
+        return
+    _registry = MetricsRegistry(service)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    add_stage_sink(_registry.stage_sink)
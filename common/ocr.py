@@ -0,0 +1,152 @@
+# common/ocr.py
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+from common.conversion_cache import CACHE_MODES, ConversionCache, make_cache_key
+from common.table_detection import count_stat
+from common.timing import stage
+
+# 스캔 페이지 OCR 설정 (환경 변수로 조정 가능)
+# - OCR_DPI: 페이지 렌더링 해상도
+# - OCR_LANG: tesseract 언어 (예: "eng", "kor+eng")
+# - OCR_GRAYSCALE: "1"이면 회색조로 렌더링 (메모리/전송량 1/3, 인식 결과는 대부분 동일)
+# - OCR_WORKERS: 동시에 실행할 tesseract 프로세스 수 (기본값: CPU 수)
+OCR_DPI = int(os.environ.get("PDF2MD_OCR_DPI", "300"))
+OCR_LANG = os.environ.get("PDF2MD_OCR_LANG", "eng")
+OCR_GRAYSCALE = os.environ.get("PDF2MD_OCR_GRAYSCALE", "0") == "1"
+OCR_WORKERS = int(os.environ.get("PDF2MD_OCR_WORKERS", str(os.cpu_count() or 1)))
+
+# OCR 결과 캐시 (렌더링한 픽셀 해시 + DPI + 언어 + tesseract 버전 기준)
+# 여러 문서에 반복해서 첨부되는 스캔 페이지(서명 양식, 직인 증명서 등)는 해시 계산만으로 결과를 재사용합니다.
+# 디스크 캐시는 모든 gunicorn 워커가 공유하며 PDF2MD_OCR_CACHE_MAX_BYTES를 넘으면 오래된 항목부터 제거합니다.
+OCR_CACHE_ENABLED = os.environ.get("PDF2MD_OCR_CACHE", "1") == "1"
+OCR_CACHE_MAX_BYTES = int(os.environ.get("PDF2MD_OCR_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+ocr_cache = ConversionCache("ocr", disk_max_bytes=OCR_CACHE_MAX_BYTES)
+
+_env_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def tesseract_version():
+    """
+    설치된 tesseract 버전 문자열 (캐시 키에 포함하여 버전이 바뀌면 다시 인식합니다).
+    """
+    return str(pytesseract.get_tesseract_version())
+
+
+def _render_page(page, dpi, grayscale, clip):
+    # (PIL 이미지, 픽셀 해시)를 반환합니다. 이미지는 픽스맵을 PNG로 인코딩/디코딩하지 않고 원시 샘플 버퍼로 바로 만들고,
+    # 해시는 같은 버퍼에서 복사 없이 계산합니다.
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    pix = page.get_pixmap(dpi=dpi, clip=clip, colorspace=colorspace, alpha=False)
+    mode = "L" if grayscale else "RGB"
+    hasher = hashlib.sha256(f"{mode}:{pix.width}x{pix.height}:".encode("ascii"))
+    hasher.update(pix.samples_mv)
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
+    return image, hasher.digest()
+
+
+def ocr_cache_key(pixel_digest, dpi, lang):
+    """
+    렌더링한 픽셀 해시, DPI, 언어, tesseract 버전으로 OCR 캐시 키를 만듭니다.
+    """
+    return make_cache_key(pixel_digest, scope="ocr", dpi=dpi, lang=lang, tesseract=tesseract_version())
+
+
+def ocr_image(image, lang=None):
+    """
+    PIL 이미지 하나를 tesseract로 인식한 텍스트를 반환합니다.
+    """
+    return pytesseract.image_to_string(image, lang=OCR_LANG if lang is None else lang)
+
+
+def ocr_pages(doc, page_indices, dpi=None, lang=None, grayscale=None, clips=None, workers=None, stats=None,
+              cache_mode="use"):
+    """
+    PyMuPDF 문서의 여러 페이지(page_indices, 0부터 시작)를 OCR하여 {페이지 인덱스: 텍스트}를 반환합니다.
+    - 렌더링은 호출한 스레드에서 순서대로 수행합니다. (PyMuPDF 문서는 스레드 간에 공유하지 않음)
+    - 렌더링한 픽셀 해시로 OCR 캐시를 먼저 조회하고, 없는 페이지만 인식합니다.
+      같은 문서 안에서 픽셀이 같은 페이지는 한 번만 인식합니다.
+    - 인식은 최대 workers개의 tesseract 프로세스로 동시에 실행합니다. 각 스레드는 tesseract 프로세스
+      하나를 기다리기만 하므로, 동시에 실행되는 tesseract 수가 곧 CPU 사용량입니다.
+    - 렌더링한 이미지는 실행 중/대기 중 작업 수(workers * 2)만큼만 메모리에 둡니다.
+    clips는 {페이지 인덱스: fitz.Rect} (헤더/푸터를 잘라낸 영역)입니다.
+    cache_mode: "use"(기본값) / "bypass" / "refresh" (PDF2MD_OCR_CACHE=0이면 항상 "bypass")
+    stats dict를 넘기면 ocr_pages(페이지 수), ocr_cache_hits(캐시 적중 수), ocr_pages_per_sec(처리량)를 기록합니다.
+    """
+    page_indices = list(page_indices)
+    if not page_indices:
+        return {}
+    if cache_mode not in CACHE_MODES:
+        raise ValueError(f"지원하지 않는 cache 모드입니다. {', '.join(CACHE_MODES)} 중 선택 가능.")
+    if not OCR_CACHE_ENABLED:
+        cache_mode = "bypass"
+    dpi = OCR_DPI if dpi is None else dpi
+    lang = OCR_LANG if lang is None else lang
+    grayscale = OCR_GRAYSCALE if grayscale is None else grayscale
+    workers = OCR_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(page_indices)))
+    clips = clips or {}
+    start = time.perf_counter()
+    results = {}
+    cache_hits = 0
+
+    if workers > 1:
+        with _env_lock:
+            # 여러 tesseract 프로세스를 동시에 실행하므로 프로세스 내부 OpenMP 스레드는 하나로 제한합니다.
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    def recognize(image, key):
+        text = ocr_image(image, lang)
+        if key is not None:
+            ocr_cache.set(key, text)
+        return text
+
+    with stage("ocr"), ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()  # (페이지 인덱스, Future, 이 페이지에서 새로 제출한 작업인지)
+        in_flight = {}  # 캐시 키 -> 같은 픽셀을 인식하는 Future
+        submitted = 0
+        for index in page_indices:
+            image, digest = _render_page(doc[index], dpi, grayscale, clips.get(index))
+            key = None if cache_mode == "bypass" else ocr_cache_key(digest, dpi, lang)
+            if key is not None and key in in_flight:
+                pending.append((index, in_flight[key], False))
+                cache_hits += 1
+                continue
+            cached = ocr_cache.get(key) if cache_mode == "use" else None
+            if cached is not None:
+                results[index] = cached
+                cache_hits += 1
+                continue
+            while submitted >= workers * 2:
+                done_index, future, owned = pending.popleft()
+                results[done_index] = future.result()
+                submitted -= owned
+            future = executor.submit(recognize, image, key)
+            if key is not None:
+                in_flight[key] = future
+            pending.append((index, future, True))
+            submitted += 1
+        for done_index, future, _ in pending:
+            results[done_index] = future.result()
+
+    elapsed = time.perf_counter() - start
+    pages_per_sec = len(page_indices) / elapsed if elapsed > 0 else 0.0
+    count_stat(stats, "ocr_pages", len(page_indices))
+    count_stat(stats, "ocr_cache_hits", cache_hits)
+    if stats is not None:
+        stats["ocr_pages_per_sec"] = round(pages_per_sec, 2)
+    logging.info("OCR %d페이지 (workers=%d): %.2f초, %.2f pages/sec", len(page_indices), workers, elapsed,
+                 pages_per_sec)
+    return results
@@ -0,0 +1,157 @@
+# common/page_routing.py
+
+import os
+from collections import namedtuple
+
+from common.table_detection import count_stat
+from common.timing import stage
+from common.upload_source import open_fitz
+
+# 페이지 분류(라우팅) 사전 단계 설정 (환경 변수로 조정 가능)
+# - PAGE_ROUTING: "1"이면 변환 전에 PyMuPDF로 모든 페이지를 분류하여, 텍스트 레이어가 없는 페이지는
+#   텍스트 추출을 시도하지 않고 바로 OCR(또는 생략)로 보냅니다. 결과는 분류하지 않을 때와 같습니다.
+#   분류 비용이 대부분의 (텍스트 레이어만 있는) 문서에서 헛되지 않도록, 먼저 표본 페이지(ROUTE_SAMPLE_PAGES)만
+#   확인하여 이미지만 있는 페이지가 하나라도 나올 때만 문서 전체를 분류합니다.
+# - ROUTE_SAMPLE_PAGES: 전체 분류 여부를 정하는 표본 페이지 수 (문서 전체에 고르게 분포)
+# - ROUTE_IMAGE_COVERAGE: 텍스트 레이어가 있어도 이미지가 페이지 면적의 이 비율 이상을 덮으면 "mixed"
+PAGE_ROUTING = os.environ.get("PDF2MD_PAGE_ROUTING", "1") == "1"
+ROUTE_SAMPLE_PAGES = int(os.environ.get("PDF2MD_ROUTE_SAMPLE_PAGES", "8"))
+ROUTE_IMAGE_COVERAGE = float(os.environ.get("PDF2MD_ROUTE_IMAGE_COVERAGE", "0.5"))
+
+# 페이지 종류
+# - "digital": 텍스트 레이어가 있는 일반 페이지 -> 텍스트 추출
+# - "scanned": 텍스트 레이어가 전혀 없는 페이지 -> 텍스트 추출 없이 바로 OCR
+# - "mixed": 텍스트 레이어는 있지만 이미지가 페이지 대부분을 덮거나 OCR로 만든 텍스트 레이어(GlyphLessFont)가 있는 페이지
+#            -> 텍스트 추출을 먼저 하고, 결과가 비어 있으면 OCR (기존 방식)
+PAGE_KINDS = ("digital", "scanned", "mixed")
+
+# OCR 프로그램이 스캔 이미지 위에 덮어쓰는 보이지 않는 텍스트 레이어용 폰트
+OCR_TEXT_LAYER_FONTS = ("GlyphLessFont",)
+
+# 페이지 하나의 분류 결과
+# chars: 텍스트 레이어의 공백이 아닌 글자 수, image_coverage: 이미지가 덮는 면적 비율(0~1),
+# fonts: 페이지에서 사용하는 폰트 이름, vector_graphics: 벡터 그림(선/사각형 등) 유무
+PageRoute = namedtuple("PageRoute", ["kind", "chars", "image_coverage", "fonts", "vector_graphics"])
+
+
+def _image_coverage(page):
+    # 페이지에 놓인 이미지 영역의 면적 합 / 페이지 면적 (겹치는 이미지는 중복 계산, 최대 1.0)
+    if not page.get_images():
+        return 0.0
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        rect = page_rect & info["bbox"]
+        if not rect.is_empty:
+            covered += rect.width * rect.height
+    return min(1.0, covered / page_area)
+
+
+def classify_page(page):
+    """
+    PyMuPDF 페이지 하나를 텍스트 레이어 글자 수, 이미지 면적 비율, 폰트로 분류한 PageRoute를 반환합니다.
+    텍스트 레이어는 페이지 영역 밖 글자까지 포함하여 세므로, "scanned"인 페이지는 어떤 엔진으로 추출해도 텍스트가 없습니다.
+    """
+    fonts = tuple(sorted({font[3] for font in page.get_fonts()}))
+    # flags=0: 미디어 박스로 자르지 않고, 이미지 블록 없이 텍스트 블록만 추출
+    blocks = page.get_text("blocks", flags=0)
+    chars = sum(len("".join(block[4].split())) for block in blocks)
+    image_coverage = _image_coverage(page)
+    if not blocks:
+        return PageRoute("scanned", 0, image_coverage, fonts, bool(page.get_cdrawings()))
+    if image_coverage >= ROUTE_IMAGE_COVERAGE or any(
+            name.endswith(ocr_font) for name in fonts for ocr_font in OCR_TEXT_LAYER_FONTS):
+        kind = "mixed"
+    else:
+        kind = "digital"
+    return PageRoute(kind, chars, image_coverage, fonts, None)
+
+
+class RoutingPlan:
+    """
+    문서의 페이지별 분류 결과(PageRoute)와, 페이지마다 어떤 추출기로 보낼지 판단하는 메서드를 제공합니다.
+    페이지 인덱스는 0부터 시작합니다. 분류하지 않은 페이지는 기존 방식(텍스트 추출 후 필요하면 OCR)으로 처리합니다.
+    프로세스 풀 워커에 그대로 넘길 수 있습니다 (pickle 가능).
+    """
+
+    def __init__(self, routes):
+        self.routes = dict(routes)
+
+    def kind(self, page_index):
+        route = self.routes.get(page_index)
+        return route.kind if route is not None else None
+
+    def pages(self, kind):
+        return [index for index, route in sorted(self.routes.items()) if route.kind == kind]
+
+    def needs_ocr(self, page_index):
+        """
+        텍스트 레이어가 없어 텍스트 추출을 건너뛰고 바로 OCR해야 하는 페이지인지 반환합니다.
+        """
+        return self.kind(page_index) == "scanned"
+
+    def has_no_content(self, page_index):
+        """
+        텍스트 레이어도 벡터 그림도 없어 텍스트/표 추출 결과가 반드시 비어 있는 페이지인지 반환합니다.
+        """
+        route = self.routes.get(page_index)
+        return route is not None and route.kind == "scanned" and not route.vector_graphics
+
+    def counts(self):
+        counts = dict.fromkeys(PAGE_KINDS, 0)
+        for route in self.routes.values():
+            counts[route.kind] += 1
+        return counts
+
+    def record_stats(self, stats):
+        """
+        stats dict에 종류별 페이지 수(pages_digital, pages_scanned, pages_mixed, 0이면 생략)를 기록합니다.
+        """
+        for kind, count in self.counts().items():
+            if count:
+                count_stat(stats, f"pages_{kind}", count)
+
+
+def _is_image_only(page):
+    # 이미지가 있고 텍스트 레이어가 전혀 없는 페이지인지 (이미지가 없는 페이지는 텍스트 추출 없이 바로 제외)
+    return bool(page.get_images()) and not page.get_text("blocks", flags=0)
+
+
+def has_image_only_pages(doc, page_indices, samples=None):
+    """
+    page_indices 중 고르게 고른 표본 페이지에 이미지만 있는(텍스트 레이어가 없는) 페이지가 있는지 반환합니다.
+    """
+    samples = ROUTE_SAMPLE_PAGES if samples is None else samples
+    page_indices = list(page_indices)
+    if len(page_indices) > samples > 1:
+        step = (len(page_indices) - 1) / (samples - 1)
+        page_indices = [page_indices[round(i * step)] for i in range(samples)]
+    elif samples <= 1:
+        page_indices = page_indices[:1]
+    return any(_is_image_only(doc[index]) for index in page_indices)
+
+
+def plan_document_pages(doc, page_indices=None, sampled=True):
+    """
+    열린 PyMuPDF 문서의 페이지(page_indices, None이면 전체)를 분류한 RoutingPlan을 반환합니다.
+    sampled가 참이면 표본 페이지에 이미지만 있는 페이지가 없을 때 분류하지 않고 None을 반환합니다.
+    (None이면 모든 페이지를 기존 방식으로 처리합니다)
+    """
+    if page_indices is None:
+        page_indices = range(doc.page_count)
+    page_indices = [index for index in page_indices if 0 <= index < doc.page_count]
+    with stage("page_routing"):
+        if sampled and not has_image_only_pages(doc, page_indices):
+            return None
+        return RoutingPlan((index, classify_page(doc[index])) for index in page_indices)
+
+
+def plan_pdf_pages(pdf_source, page_indices=None, sampled=True):
+    """
+    PDF(바이트 또는 파일 경로)를 PyMuPDF로 열어 페이지를 분류한 RoutingPlan(또는 None)을 반환합니다.
+    """
+    with open_fitz(pdf_source) as doc:
+        return plan_document_pages(doc, page_indices, sampled)
@@ -0,0 +1,109 @@
+# common/page_selection.py
+
+import re
+
+_PAGE_TOKEN_PATTERN = re.compile(r"^(\d+)(?:\s*-\s*(\d+))?$")
+
+
+class PageSelectionError(ValueError):
+    """
+    페이지 선택이 문서와 맞지 않을 때(문서 끝을 넘어서 시작하는 범위 등) 발생합니다. (클라이언트 오류, HTTP 400)
+    """
+
+
+def parse_page_spec(spec):
+    """
+    "1-5,10" 형식의 페이지 지정 문자열을 1부터 시작하는 (시작, 끝) 범위 리스트로 변환합니다.
+    범위는 오름차순으로 정렬하고 겹치거나 맞닿은 범위는 합칩니다.
+    페이지 번호 목록을 만들지 않으므로 "1-20000000" 같은 큰 범위도 메모리를 쓰지 않으며,
+    실제 페이지 수에 맞춰 자르는 일은 PageSelection.resolve()에서 합니다.
+    """
+    ranges = []
+    for token in spec.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        match = _PAGE_TOKEN_PATTERN.match(token)
+        if not match:
+            raise ValueError(f"잘못된 페이지 지정입니다: '{token}' (예: 1-5,10)")
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        if start < 1 or end < start:
+            raise ValueError(f"잘못된 페이지 범위입니다: '{token}'")
+        ranges.append((start, end))
+    if not ranges:
+        raise ValueError("페이지 지정이 비어 있습니다.")
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class PageSelection:
+    """
+    /convert 요청의 페이지 선택 옵션.
+    - pages: "1-5,10" 형식의 페이지 지정
+    - first_n: 앞에서부터 N 페이지만 (pages와 함께 쓰면 두 조건을 모두 만족하는 페이지)
+    - max_pages: 선택된 페이지 중 앞에서부터 최대 N 페이지만
+    """
+
+    def __init__(self, pages=None, max_pages=None, first_n=None):
+        self.page_ranges = parse_page_spec(pages) if pages else None
+        for name, value in (("max_pages", max_pages), ("first_n", first_n)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name}는 1 이상이어야 합니다.")
+        self.max_pages = max_pages
+        self.first_n = first_n
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Flask request.values 등에서 pages / max_pages / first_n 값을 읽어 PageSelection을 만듭니다.
+        """
+        def to_int(name):
+            value = values.get(name)
+            if value is None or value == "":
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"{name}는 정수여야 합니다.")
+
+        return cls(values.get("pages") or None, to_int("max_pages"), to_int("first_n"))
+
+    def is_all(self):
+        """
+        페이지 제한이 없는 경우 True를 반환합니다.
+        """
+        return self.page_ranges is None and self.max_pages is None and self.first_n is None
+
+    def cache_key(self):
+        """
+        문서 페이지 수를 몰라도 만들 수 있는, 캐시 키용 선택 조건 값을 반환합니다. (제한이 없으면 None)
+        같은 문서라면 이 값이 같을 때 resolve() 결과도 같습니다.
+        """
+        if self.is_all():
+            return None
+        ranges = None if self.page_ranges is None else [list(page_range) for page_range in self.page_ranges]
+        return {"ranges": ranges, "max_pages": self.max_pages, "first_n": self.first_n}
+
+    def resolve(self, page_count):
+        """
+        문서 전체 페이지 수를 기준으로 실제 변환할 페이지 번호(1부터 시작) 리스트를 반환합니다.
+        범위의 끝이 문서를 넘으면 문서 끝까지로 자르고, 범위의 시작이 문서를 넘으면 PageSelectionError를 발생시킵니다.
+        """
+        last = page_count if self.first_n is None else min(page_count, self.first_n)
+        if self.page_ranges is None:
+            page_numbers = list(range(1, last + 1))
+        else:
+            for start, end in self.page_ranges:
+                if start > page_count:
+                    span = str(start) if start == end else f"{start}-{end}"
+                    raise PageSelectionError(f"페이지 범위가 문서 페이지 수({page_count})를 넘습니다: '{span}'")
+            page_numbers = [n for start, end in self.page_ranges for n in range(start, min(end, last) + 1)]
+        if self.max_pages is not None:
+            page_numbers = page_numbers[:self.max_pages]
+        return page_numbers
@@ -0,0 +1,15 @@
+# common/process_pool.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def spawn_process_pool(max_workers, initializer=None, initargs=()):
+    """
+    spawn 방식으로 워커를 만드는 ProcessPoolExecutor를 반환합니다.
+    gunicorn 워커에는 OCR 스레드 풀, 작업 디스패처 등 스레드가 이미 돌고 있을 수 있어,
+    기본 fork 방식으로 자식을 만들면 다른 스레드가 잡고 있던 락이 자식에서 영원히 풀리지 않을 수 있습니다.
+    워커 함수와 인자는 모듈 최상위에 정의되어 pickle 가능해야 합니다.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=initializer, initargs=initargs)
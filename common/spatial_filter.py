@@ -0,0 +1,46 @@
+# common/spatial_filter.py
+
+import numpy as np
+
+# 한 번에 비교할 (점 x 박스) 쌍의 최대 개수. 이보다 크면 점을 나누어 처리하여 메모리 사용을 제한합니다.
+MAX_PAIRS_PER_BATCH = 1_000_000
+
+
+def points_in_boxes(xs, ys, boxes, margin=0.0):
+    """
+    점 (xs[i], ys[i])들이 박스 목록 중 하나라도 안에 포함되는지 한 번에 검사합니다.
+    박스는 (x0, top, x1, bottom) 형식이며, 경계는 포함(inclusive)하고 margin만큼 박스를 넓혀 비교합니다.
+    반환값: 점마다 포함 여부를 담은 bool 배열 (numpy.ndarray)
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if len(boxes) == 0 or xs.size == 0:
+        return np.zeros(xs.shape, dtype=bool)
+
+    b = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x0 = b[:, 0] - margin
+    top = b[:, 1] - margin
+    x1 = b[:, 2] + margin
+    bottom = b[:, 3] + margin
+
+    result = np.empty(xs.shape, dtype=bool)
+    step = max(1, MAX_PAIRS_PER_BATCH // len(b))
+    for start in range(0, xs.size, step):
+        px = xs[start:start + step, None]
+        py = ys[start:start + step, None]
+        inside = (x0 <= px) & (px <= x1) & (top <= py) & (py <= bottom)
+        result[start:start + step] = inside.any(axis=1)
+    return result
+
+
+def word_centers_in_boxes(words, boxes, margin=0.0):
+    """
+    pdfplumber extract_words() 결과의 단어 중심점이 박스 안에 있는지 검사합니다.
+    반환값: 단어마다 포함 여부를 담은 bool 배열
+    """
+    if not words or len(boxes) == 0:
+        return np.zeros(len(words), dtype=bool)
+    coords = np.array([(w["x0"], w["x1"], w["top"], w["bottom"]) for w in words], dtype=np.float64)
+    cx = (coords[:, 0] + coords[:, 1]) / 2
+    cy = (coords[:, 2] + coords[:, 3]) / 2
+    return points_in_boxes(cx, cy, boxes, margin=margin)
@@ -0,0 +1,76 @@
+# common/table_detection.py
+
+# 표 탐지 방식
+# - "lines": 선/사각형 기반(pdfplumber 기본값). 선·사각형·곡선 객체가 없는 페이지는 표가 있을 수 없으므로
+#            find_tables() 호출 자체를 건너뜁니다.
+# - "text": 텍스트 정렬 기반. 괘선 없는 표가 있는 문서용이며, 사전 검사 없이 항상 표 탐지를 수행합니다.
+TABLE_STRATEGIES = ("lines", "text")
+
+TEXT_TABLE_SETTINGS = {
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+}
+
+
+def count_stat(stats, key, amount=1):
+    """
+    stats dict가 주어졌을 때만 key 항목을 amount만큼 증가시킵니다.
+    """
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + amount
+
+
+def merge_stats(target, source):
+    """
+    source의 카운터 값들을 target에 더합니다. (병렬 워커 결과 합산용)
+    """
+    if target is None or not source:
+        return
+    for key, value in source.items():
+        target[key] = target.get(key, 0) + value
+
+
+def has_ruling_graphics(page):
+    """
+    pdfplumber 페이지(또는 잘라낸 페이지)에 선/사각형/곡선 객체가 있는지 확인합니다.
+    이 객체들이 없으면 선 기반 표(lattice table)의 테두리가 될 edge가 없습니다.
+    """
+    objects = page.objects
+    return bool(objects.get("line") or objects.get("rect") or objects.get("curve"))
+
+
+# PyMuPDF 벡터 그림 항목 중 표 테두리(edge)가 될 수 있는 종류: 선, 사각형, 사각형(quad)
+FITZ_RULING_ITEMS = ("l", "re", "qu")
+
+
+def has_fitz_ruling_graphics(page, clip):
+    """
+    PyMuPDF 페이지의 clip 영역에 닿는 선/사각형 그림이 있는지 확인합니다.
+    가로/세로 선의 영역은 높이나 너비가 0이라 fitz.Rect.intersects()가 항상 거짓이므로,
+    경계를 포함하는 좌표 비교로 겹침을 판단합니다.
+    """
+    for drawing in page.get_cdrawings():
+        rect = drawing["rect"]
+        if rect[0] > clip.x1 or rect[2] < clip.x0 or rect[1] > clip.y1 or rect[3] < clip.y0:
+            continue
+        if any(item[0] in FITZ_RULING_ITEMS for item in drawing["items"]):
+            return True
+    return False
+
+
+def find_tables(page, strategy="lines", stats=None):
+    """
+    지정한 방식으로 pdfplumber 페이지의 표를 찾습니다.
+    건너뛴 페이지 수와 실제 탐지한 페이지 수를 stats에 기록합니다.
+    """
+    if strategy == "lines":
+        if not has_ruling_graphics(page):
+            count_stat(stats, "table_detection_skipped")
+            return []
+        count_stat(stats, "table_detection_run")
+        return page.find_tables()
+    elif strategy == "text":
+        count_stat(stats, "table_detection_run")
+        return page.find_tables(table_settings=TEXT_TABLE_SETTINGS)
+    else:
+        raise ValueError(f"지원하지 않는 표 탐지 방식입니다. {', '.join(TABLE_STRATEGIES)} 중 선택 가능.")
@@ -0,0 +1,116 @@
+# common/timing.py
+
+import threading
+import time
+
+# 단계별 시간 측정 훅.
+# 변환 코드는 `with stage("find_tables"):`처럼 단계를 표시하기만 하고,
+# 측정은 record_stages()(벤치마크 등) 또는 add_stage_sink()(메트릭 등)로 켰을 때만 수행합니다.
+# 아무것도 켜지 않은 상태에서 stage()는 전역 플래그 하나를 확인하고 공용 no-op 객체를 반환할 뿐입니다.
+
+_sinks = []
+_local = threading.local()
+_active = 0  # 켜져 있는 기록기/싱크 수 (0이면 측정하지 않음)
+_lock = threading.Lock()
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        record_stage(self.name, elapsed)
+        return False
+
+
+def stage(name):
+    """
+    변환 단계 하나를 감싸는 컨텍스트 매니저를 반환합니다. 측정이 꺼져 있으면 아무 일도 하지 않습니다.
+    """
+    if not _active:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def record_stage(name, seconds):
+    """
+    이미 측정한 단계 시간을 기록기/싱크에 전달합니다.
+    """
+    recorder = getattr(_local, "recorder", None)
+    if recorder is not None:
+        entry = recorder.get(name)
+        if entry is None:
+            recorder[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+    for sink in _sinks:
+        sink(name, seconds)
+
+
+def _adjust_active(delta):
+    global _active
+    with _lock:
+        _active += delta
+
+
+class record_stages:
+    """
+    블록 안에서 현재 스레드가 실행한 단계별 (누적 시간, 횟수)를 모읍니다.
+
+        with record_stages() as stages:
+            process_pdf_to_markdown(path)
+        stages  # {"find_tables": [1.23, 20], ...}
+    """
+
+    def __enter__(self):
+        self.stages = {}
+        self._previous = getattr(_local, "recorder", None)
+        _local.recorder = self.stages
+        _adjust_active(1)
+        return self.stages
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.recorder = self._previous
+        if self._previous is not None:
+            for name, (seconds, count) in self.stages.items():
+                entry = self._previous.setdefault(name, [0.0, 0])
+                entry[0] += seconds
+                entry[1] += count
+        _adjust_active(-1)
+        return False
+
+
+def add_stage_sink(sink):
+    """
+    모든 스레드의 단계 시간을 받을 함수 sink(name, seconds)를 등록합니다.
+    """
+    with _lock:
+        _sinks.append(sink)
+    _adjust_active(1)
+
+
+def remove_stage_sink(sink):
+    with _lock:
+        _sinks.remove(sink)
+    _adjust_active(-1)
@@ -0,0 +1,107 @@
+# common/upload_source.py
+
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+# 업로드 파일을 디스크에 쓰지 않고 메모리(bytes)로 처리하는 최대 크기 (환경 변수로 조정 가능)
+# 이 크기를 넘는 업로드만 임시 파일로 내려 쓰고 경로로 처리합니다.
+UPLOAD_SPOOL_BYTES = int(os.environ.get("PDF2MD_UPLOAD_SPOOL_BYTES", str(64 * 1024 * 1024)))
+
+
+@contextmanager
+def upload_source(data, suffix, spool_bytes=None):
+    """
+    업로드 바이트를 변환 함수에 넘길 입력(source)으로 만듭니다.
+    - spool_bytes 이하: bytes를 그대로 넘김 (디스크 I/O 없음)
+    - spool_bytes 초과: 임시 파일에 한 번만 쓰고 그 경로를 넘김 (블록을 벗어나면 삭제)
+    """
+    spool_bytes = UPLOAD_SPOOL_BYTES if spool_bytes is None else spool_bytes
+    if len(data) <= spool_bytes:
+        yield data
+        return
+    tmp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+        yield tmp_path
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def as_file(source):
+    """
+    source(bytes 또는 파일 경로)를 파일 경로나 파일 객체를 받는 라이브러리(python-docx 등)에 넘길 형태로 바꿉니다.
+    """
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def open_fitz(source):
+    """
+    source(bytes 또는 파일 경로)를 PyMuPDF 문서로 엽니다.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def open_pdfplumber(source):
+    """
+    source(bytes 또는 파일 경로)를 pdfplumber PDF로 엽니다.
+    """
+    return pdfplumber.open(as_file(source))
+
+
+class DocumentContext:
+    """
+    PDF 하나(bytes 또는 파일 경로)를 엔진별로 한 번만 열어 여러 처리 단계가 공유하는 컨텍스트.
+    PyMuPDF 문서(fitz)와 pdfplumber PDF(pdfplumber)는 처음 사용할 때 열고,
+    with 블록을 벗어나거나 close()를 호출하면 연 문서를 모두 닫습니다.
+
+        with DocumentContext(source) as ctx:
+            ctx.page_count
+            ctx.fitz[0].get_text()
+            ctx.pdfplumber.pages[0].extract_text()
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._fitz = None
+        self._pdfplumber = None
+
+    @property
+    def fitz(self):
+        if self._fitz is None:
+            self._fitz = open_fitz(self.source)
+        return self._fitz
+
+    @property
+    def pdfplumber(self):
+        if self._pdfplumber is None:
+            self._pdfplumber = open_pdfplumber(self.source)
+        return self._pdfplumber
+
+    @property
+    def page_count(self):
+        return self.fitz.page_count
+
+    def close(self):
+        if self._pdfplumber is not None:
+            self._pdfplumber.close()
+            self._pdfplumber = None
+        if self._fitz is not None:
+            self._fitz.close()
+            self._fitz = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -1,18 +1,38 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import os
 import re
-import tempfile
-import io
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from functools import partial
+from itertools import accumulate
 
-import pdfplumber
 import fitz  # PyMuPDF
-import pytesseract
-from PIL import Image
-from pymupdf4llm import LlamaMarkdownReader
+import pymupdf4llm
 from docx import Document
 
+from common.band_detection import CROP_MODES, band_clip, detect_page_bands
+from common.batch import collect_batch_files, stream_batch_ndjson
+from common.layout import BY_Y_X, Page, TableBlock, TextBlock
+from common.conversion_cache import CACHE_MODES, ConversionCache, get_or_convert, make_cache_key
+from common.metrics import install_metrics, record_error, record_pages
+from common.ocr import ocr_cache, ocr_pages
+from common.page_routing import PAGE_ROUTING, plan_document_pages
+from common.page_selection import PageSelection, PageSelectionError
+from common.spatial_filter import points_in_boxes
+from common.table_detection import TABLE_STRATEGIES, find_tables
+from common.timing import stage
+from common.upload_source import DocumentContext, as_file, open_fitz, upload_source
+
 app = Flask(__name__)
+# /metrics 엔드포인트 (PDF2MD_METRICS=1일 때 요청/단계 메트릭 수집)
+install_metrics(app, "docx2md")
+
+# /convert 결과 캐시 (업로드 바이트 해시 + 변환 엔진 기준)
+conversion_cache = ConversionCache("docx2md")
+
+# pymupdf4llm.to_markdown()은 pymupdf.layout이 설치되어 있으면 레이아웃 모델 경로를 쓰는데, 이 경로는
+# margins/table_strategy를 무시하고 OCR까지 수행합니다. 규칙 기반 경로(헤더/푸터 띠 크롭, 표 탐지 끄기 지원)를 씁니다.
+pymupdf4llm.use_layout(False)
 
 #####################
 # PDF 처리 관련 함수
@@ -30,91 +50,166 @@ def estimate_font_weight(text):
 def cluster_positions(positions, tolerance=2.0):
     """
     위치 값들을 tolerance 범위 내에서 클러스터링하여 클러스터 중심값 리스트를 반환합니다.
+    위치를 정렬된 순서로 한 번만 훑습니다. 이전 클러스터들은 다음 클러스터가 만들어질 때 이미 tolerance보다
+    멀어졌고 이후 위치는 커지기만 하므로, 마지막 클러스터와만 비교해도 모든 클러스터와 비교한 결과와 같습니다.
     """
     clusters = []
     for pos in sorted(positions):
-        found = False
-        for cluster in clusters:
-            if abs(cluster[0] - pos) <= tolerance:
-                # 평균값 업데이트
-                cluster[0] = (cluster[0] * cluster[1] + pos) / (cluster[1] + 1)
-                cluster[1] += 1
-                found = True
-                break
-        if not found:
+        if clusters and abs(clusters[-1][0] - pos) <= tolerance:
+            cluster = clusters[-1]
+            # 평균값 업데이트
+            cluster[0] = (cluster[0] * cluster[1] + pos) / (cluster[1] + 1)
+            cluster[1] += 1
+        else:
             clusters.append([pos, 1])
     return [cluster[0] for cluster in clusters]
 
+def tolerance_range(sorted_values, center, tolerance):
+    """
+    정렬된 값 목록에서 abs(value - center) <= tolerance인 값들의 인덱스 범위 (lo, hi)를 반환합니다.
+    bisect로 찾은 경계를 같은 비교식으로 보정하므로, 모든 값을 비교한 결과와 부동소수점 경계까지 같습니다.
+    """
+    n = len(sorted_values)
+    lo = bisect_left(sorted_values, center - tolerance)
+    while lo > 0 and abs(sorted_values[lo - 1] - center) <= tolerance:
+        lo -= 1
+    while lo < n and abs(sorted_values[lo] - center) > tolerance:
+        lo += 1
+    hi = bisect_right(sorted_values, center + tolerance)
+    while hi < n and abs(sorted_values[hi] - center) <= tolerance:
+        hi += 1
+    while hi > lo and abs(sorted_values[hi - 1] - center) > tolerance:
+        hi -= 1
+    return lo, hi
+
+def near_any_position(sorted_positions, value, tolerance):
+    """
+    abs(value - pos) < tolerance인 pos가 정렬된 위치 목록에 있는지 반환합니다.
+    value 양옆의 가장 가까운 위치 두 개만 비교합니다.
+    """
+    index = bisect_left(sorted_positions, value)
+    if index < len(sorted_positions) and abs(value - sorted_positions[index]) < tolerance:
+        return True
+    return index > 0 and abs(value - sorted_positions[index - 1]) < tolerance
+
+def repeated_cluster_positions(page_occurrences, clusters, tolerance, min_count):
+    """
+    클러스터 중심값마다 tolerance 이내의 y 좌표에 나타난 (y 좌표, 페이지) 수를 세어,
+    min_count 이상인 클러스터 중심값(소수 첫째 자리 반올림) 집합을 반환합니다.
+    y 좌표를 정렬하고 페이지 수 누적합을 만들어, 클러스터마다 이진 탐색 두 번으로 셉니다.
+    """
+    ys = sorted(page_occurrences)
+    prefix = list(accumulate((len(page_occurrences[y]) for y in ys), initial=0))
+    common_y = set()
+    for cluster in clusters:
+        lo, hi = tolerance_range(ys, cluster, tolerance)
+        if prefix[hi] - prefix[lo] >= min_count:
+            common_y.add(round(cluster, 1))
+    return common_y
+
+def llama_page_number(doc_item):
+    """
+    pymupdf4llm 페이지 문서의 페이지 번호(1부터 시작)를 반환합니다. (없으면 0)
+    pymupdf4llm 버전에 따라 metadata["page_number"] 또는 metadata["page"]에 들어 있습니다.
+    """
+    metadata = doc_item.metadata
+    return metadata.get("page_number", metadata.get("page", 0))
+
 def detect_common_y_positions(documents, page_count, tolerance=2.0, threshold=0.8):
     """
     여러 페이지에서 y 좌표들이 군집화되어 반복된다면 해당 클러스터 중심값을 반환합니다.
+    위치 정보(metadata["bbox"])가 없는 문서는 세지 않습니다.
     """
     y_positions = []
     page_occurrences = defaultdict(set)
     for doc in documents:
-        page = doc.metadata.get("page_number", 0)
-        y = doc.metadata.get("bbox", [0, 0, 0, 0])[1]
+        bbox = doc.metadata.get("bbox")
+        if bbox is None:
+            continue
+        page = llama_page_number(doc)
+        y = bbox[1]
         y_positions.append(y)
         page_occurrences[y].add(page)
     clusters = cluster_positions(y_positions, tolerance)
-    common_y = set()
-    for cluster in clusters:
-        count = 0
-        for y, pages in page_occurrences.items():
-            if abs(y - cluster) <= tolerance:
-                count += len(pages)
-        if count >= page_count * threshold:
-            common_y.add(round(cluster, 1))
-    return common_y
+    return repeated_cluster_positions(page_occurrences, clusters, tolerance, page_count * threshold)
 
-def detect_repeated_footer_positions(pdf_path, documents, tolerance=2.0, threshold=0.8, bottom_ratio=0.9):
+def detect_repeated_footer_positions(doc, documents, tolerance=2.0, threshold=0.8, bottom_ratio=0.9):
     """
     각 페이지 하단의 텍스트 y 좌표를 군집화하여, 반복되는 footer 영역의 y 좌표 집합을 반환합니다.
+    doc은 이미 열린 PyMuPDF 문서입니다. 위치 정보(metadata["bbox"])가 없는 문서는 세지 않습니다.
     """
-    doc = fitz.open(pdf_path)
     page_count = doc.page_count
     y_positions = []
     page_occurrences = defaultdict(set)
+    page_heights = {}  # 페이지 인덱스 -> 높이 (텍스트 블록마다 페이지를 다시 읽지 않도록)
     for doc_item in documents:
-        page_num = doc_item.metadata.get("page_number", 0)
+        bbox = doc_item.metadata.get("bbox")
+        page_num = llama_page_number(doc_item)
         page_idx = page_num - 1
-        if page_idx < 0 or page_idx >= page_count:
+        if bbox is None or page_idx < 0 or page_idx >= page_count:
             continue
-        page_height = doc[page_idx].rect.height
-        y_top = doc_item.metadata.get("bbox", [0, 0, 0, 0])[1]
+        page_height = page_heights.get(page_idx)
+        if page_height is None:
+            page_height = page_heights[page_idx] = doc[page_idx].rect.height
+        y_top = bbox[1]
         if y_top >= page_height * bottom_ratio:
             y_positions.append(y_top)
             page_occurrences[y_top].add(page_num)
     clusters = cluster_positions(y_positions, tolerance)
-    common_y = set()
-    for cluster in clusters:
-        count = 0
-        for y, pages in page_occurrences.items():
-            if abs(y - cluster) <= tolerance:
-                count += len(pages)
-        if count >= page_count * threshold:
-            common_y.add(round(cluster, 1))
-    return common_y
+    return repeated_cluster_positions(page_occurrences, clusters, tolerance, page_count * threshold)
+
+# pymupdf4llm.to_markdown(page_chunks=True)의 페이지 하나 (text: 페이지 Markdown, metadata: 페이지 번호 등)
+LlamaPage = namedtuple("LlamaPage", ["text", "metadata"])
 
-def extract_text_by_page_with_llama(pdf_path):
+def load_llama_documents(document, bands=None):
     """
-    LlamaMarkdownReader를 사용하여 PDF의 텍스트와 메타정보를 추출합니다.
+    PDF의 페이지별 Markdown을 pymupdf4llm.to_markdown(page_chunks=True)로 추출하여 LlamaPage 목록을 반환합니다.
+    DocumentContext에서 이미 연 PyMuPDF 문서를 그대로 넘깁니다.
+    bands(PageBands)를 넘기면 페이지마다 헤더/푸터 띠를 pymupdf4llm margins로 넘겨 추출 전에 잘라냅니다.
+    (margins는 페이지 높이에 따라 달라지므로 높이가 같은 페이지끼리 한 번에 추출합니다)
+    """
+    doc = document.fitz
+    page_groups = defaultdict(list)  # margins -> 페이지 인덱스 목록
+    for page in doc:
+        if bands is None:
+            margins = 0
+        else:
+            height = page.rect.height
+            margins = (0, height * bands.header_ratio, 0, height * bands.footer_ratio)
+        page_groups[margins].append(page.number)
+    documents = []
+    for margins, page_indices in page_groups.items():
+        # 표는 pdfplumber로 따로 추출하므로 pymupdf4llm의 표 탐지는 끕니다 (같은 표가 두 번 나오지 않도록).
+        chunks = pymupdf4llm.to_markdown(doc, pages=page_indices, page_chunks=True, margins=margins,
+                                         table_strategy=None, show_progress=False)
+        documents.extend(LlamaPage(chunk["text"], chunk["metadata"]) for chunk in chunks)
+    return documents
+
+def extract_text_by_page_with_llama(document, bands=None):
+    """
+    pymupdf4llm으로 PDF의 페이지별 텍스트와 메타정보를 추출합니다.
     반복되는 Header/Footer 영역은 제거합니다.
+    bands(PageBands)를 넘기면 추출 후 반복 y 좌표를 거르는 대신, 탐지된 띠를 추출 전에 잘라냅니다.
+    document는 PDF를 연 DocumentContext입니다.
     """
-    reader = LlamaMarkdownReader()
-    documents = reader.load_data(pdf_path)
-    page_count = max(doc.metadata.get("page_number", 0) for doc in documents)
-    common_y_positions = detect_common_y_positions(documents, page_count)
-    repeated_footers = detect_repeated_footer_positions(pdf_path, documents)
-    remove_y_positions = common_y_positions.union(repeated_footers)
+    documents = load_llama_documents(document, bands)
+    if bands is None:
+        page_count = max((llama_page_number(doc) for doc in documents), default=0)
+        common_y_positions = detect_common_y_positions(documents, page_count)
+        repeated_footers = detect_repeated_footer_positions(document.fitz, documents)
+        remove_y_positions = common_y_positions.union(repeated_footers)
+    else:
+        remove_y_positions = set()
     tolerance = 2.0
+    sorted_remove_y = sorted(remove_y_positions)
 
     page_items = defaultdict(list)
     for doc_item in documents:
-        page_num = doc_item.metadata.get("page_number", 0)
+        page_num = llama_page_number(doc_item)
+        # 페이지 전체 텍스트 하나로 된 문서는 위치 정보가 없어 (0, 0)에 놓고, 반복 y 좌표로 거르지 않습니다.
+        has_bbox = "bbox" in doc_item.metadata
         bbox = doc_item.metadata.get("bbox", [0, 0, 0, 0])
-        y_top = round(bbox[1], 1)
-        if any(abs(y_top - pos) < tolerance for pos in remove_y_positions):
+        if has_bbox and near_any_position(sorted_remove_y, round(bbox[1], 1), tolerance):
             continue
 
         color = doc_item.metadata.get("font_color", "#000000")
@@ -122,57 +217,113 @@ def extract_text_by_page_with_llama(pdf_path):
         font_size = bbox[3] - bbox[1]
         link = doc_item.metadata.get("uri", None)
         content = doc_item.text.strip()
+        if not content:
+            # 텍스트가 없는 페이지는 fallback(pdfplumber 텍스트/OCR)으로 처리되도록 비워 둡니다.
+            continue
         if link:
             content = f"[{content}]({link})"
-        item = {
-            "type": "text",
-            "content": content,
-            "x": bbox[0],
-            "y": bbox[1],
-            "font_size": font_size,
-            "font_weight": estimate_font_weight(doc_item.text),
-            "font_color": color,
-            "bg_color": bgcolor
-        }
+        item = TextBlock(bbox[0], bbox[1], content, font_size, estimate_font_weight(doc_item.text), color, bgcolor)
         page_items[page_num].append(item)
     return page_items
 
-def extract_text_from_pdfplumber_or_ocr(pdf_path):
-    """
-    pdfplumber로 텍스트를 추출하고, 텍스트가 없으면 pytesseract로 OCR 처리합니다.
-    """
-    doc = fitz.open(pdf_path)
-    results = defaultdict(list)
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_index, page in enumerate(pdf.pages):
-            text = page.extract_text()
-            if text and text.strip():
-                results[page_index + 1].append({
-                    "type": "text",
-                    "content": text.strip(),
-                    "x": 0,
-                    "y": 0,
-                    "font_size": 12,
-                    "font_weight": "normal",
-                    "font_color": "#000000",
-                    "bg_color": "#FFFFFF"
-                })
-            else:
-                pix = doc.load_page(page_index).get_pixmap(dpi=300)
-                image = Image.open(io.BytesIO(pix.tobytes()))
-                ocr_text = pytesseract.image_to_string(image, lang='eng')
-                if ocr_text.strip():
-                    results[page_index + 1].append({
-                        "type": "text",
-                        "content": ocr_text.strip(),
-                        "x": 0,
-                        "y": 0,
-                        "font_size": 12,
-                        "font_weight": "normal",
-                        "font_color": "#000000",
-                        "bg_color": "#FFFFFF"
-                    })
-    return results
+def crop_page_bands(page, bands):
+    """
+    pdfplumber 페이지에서 헤더/푸터 띠(PageBands)를 잘라낸 페이지를 반환합니다. bands가 None이면 그대로 반환합니다.
+    """
+    if bands is None:
+        return page
+    return page.within_bbox(band_clip(page.width, page.height, bands))
+
+def text_to_items(text):
+    """
+    페이지 전체 텍스트를 TextBlock 하나를 담은 목록(텍스트가 없으면 빈 목록)으로 만듭니다.
+    """
+    if text and text.strip():
+        return [TextBlock(0, 0, text.strip(), font_size=12)]
+    return []
+
+def ocr_clip(fitz_page, bands):
+    """
+    OCR할 영역 (bands가 None이면 페이지 전체)을 반환합니다.
+    """
+    if bands is None:
+        return None
+    return fitz.Rect(*band_clip(fitz_page.rect.width, fitz_page.rect.height, bands))
+
+def extract_page_text_items(document, page_index, bands=None):
+    """
+    페이지 하나(page_index는 0부터 시작)의 텍스트 레이어를 pdfplumber로 추출합니다. (OCR은 하지 않음)
+    """
+    return text_to_items(crop_page_bands(document.pdfplumber.pages[page_index], bands).extract_text())
+
+def extract_page_text_from_pdfplumber_or_ocr(document, page_index, bands=None, routes=None):
+    """
+    페이지 하나(page_index는 0부터 시작)에서 pdfplumber로 텍스트를 추출하고, 텍스트가 없으면 tesseract로 OCR 처리합니다.
+    document는 PDF를 연 DocumentContext입니다 (pdfplumber 페이지와 OCR용 PyMuPDF 페이지를 함께 사용).
+    bands(PageBands)를 넘기면 헤더/푸터 띠를 잘라낸 영역에서만 추출(OCR 포함)합니다.
+    routes(RoutingPlan)에서 텍스트 레이어가 없다고 분류한 페이지는 pdfplumber 추출 없이 바로 OCR합니다.
+    페이지 전체 텍스트 하나를 담은 TextBlock 목록(텍스트가 없으면 빈 목록)을 반환합니다.
+    """
+    if routes is None or not routes.needs_ocr(page_index):
+        items = extract_page_text_items(document, page_index, bands)
+        if items:
+            return items
+    doc = document.fitz
+    texts = ocr_pages(doc, [page_index], clips={page_index: ocr_clip(doc[page_index], bands)})
+    return text_to_items(texts[page_index])
+
+class LazyFallbackText:
+    """
+    pymupdf4llm 텍스트가 없는 페이지에만 fallback 텍스트(pdfplumber 텍스트 또는 OCR)를 추출하도록,
+    페이지별 추출을 처음 요청될 때 수행하고 결과를 기억합니다.
+    prefetch()로 필요한 페이지를 미리 알려 주면 텍스트 레이어가 없는 페이지들을 OCR 풀에서 한꺼번에 처리합니다.
+    routes(RoutingPlan)를 넘기면 스캔 페이지로 분류된 페이지는 pdfplumber 추출을 시도하지 않고 바로 OCR합니다.
+    """
+
+    def __init__(self, document, bands=None, stats=None, routes=None):
+        self.document = document
+        self.bands = bands
+        self.stats = stats
+        self.routes = routes
+        self._pages = {}
+
+    def prefetch(self, page_nums):
+        """
+        페이지 번호(1부터 시작) 목록의 fallback 텍스트를 미리 추출합니다.
+        텍스트 레이어가 없는 페이지는 ocr_pages()로 동시에 OCR합니다.
+        """
+        scanned = []
+        with stage("fallback_text"):
+            for page_num in page_nums:
+                if page_num in self._pages:
+                    continue
+                if self.routes is not None and self.routes.needs_ocr(page_num - 1):
+                    scanned.append(page_num - 1)
+                    continue
+                items = extract_page_text_items(self.document, page_num - 1, self.bands)
+                if items:
+                    self._pages[page_num] = items
+                else:
+                    scanned.append(page_num - 1)
+        if not scanned:
+            return
+        doc = self.document.fitz
+        clips = {index: ocr_clip(doc[index], self.bands) for index in scanned}
+        texts = ocr_pages(doc, scanned, clips=clips, stats=self.stats)
+        for index in scanned:
+            self._pages[index + 1] = text_to_items(texts[index])
+
+    def get(self, page_num):
+        """
+        페이지 번호(1부터 시작)의 TextBlock 목록을 반환합니다. (텍스트가 없으면 빈 목록)
+        """
+        items = self._pages.get(page_num)
+        if items is None:
+            with stage("fallback_text"):
+                items = extract_page_text_from_pdfplumber_or_ocr(self.document, page_num - 1, self.bands,
+                                                                 self.routes)
+            self._pages[page_num] = items
+        return items
 
 def convert_table_to_markdown(table):
     """
@@ -190,15 +341,16 @@ def convert_table_to_markdown(table):
     ]
     return "\n".join([header, separator] + rows)
 
-def classify_heading(item):
+def classify_heading(item, content=None):
     """
     폰트 크기와 bold 여부에 따라 Markdown 헤더 또는 일반 텍스트로 변환합니다.
+    item은 TextBlock이며, content를 넘기면 item의 내용 대신 사용합니다.
     """
-    size = item.get("font_size", 0)
-    bold = (item.get("font_weight", "normal") == "bold")
-    content = item['content'].strip()
-    font_color = item.get("font_color", "#000000")
-    bg_color = item.get("bg_color", "#FFFFFF")
+    size = item.font_size
+    bold = (item.font_weight == "bold")
+    content = (item.content if content is None else content).strip()
+    font_color = item.font_color
+    bg_color = item.bg_color
     highlight = (font_color.lower() not in ["#000000", "#000", "black"]) or (bg_color.lower() != "#ffffff")
     style_prefix = "**" if (highlight or bold) else ""
     styled_content = f"{style_prefix}{content}{style_prefix}"
@@ -222,10 +374,10 @@ def classify_heading(item):
 
 def process_text_item(item):
     """
-    텍스트 아이템 내에서 bold 상태이고 행 전체가 짧은 경우 소제목(헤더)로 처리합니다.
+    텍스트 아이템(TextBlock) 내에서 bold 상태이고 행 전체가 짧은 경우 소제목(헤더)로 처리합니다.
     """
-    content = item["content"].strip()
-    if item.get("font_weight", "normal") == "bold":
+    content = item.content.strip()
+    if item.font_weight == "bold":
         lines = content.split("\n")
         header_lines = []
         body_lines = []
@@ -248,7 +400,7 @@ def process_text_item(item):
             return ""
         first = paragraphs[0].strip()
         if len(first) < 50:
-            header = classify_heading({**item, "content": first})
+            header = classify_heading(item, first)
             body = "\n\n".join(p.strip() for p in paragraphs[1:] if p.strip())
             if body:
                 return header + "\n\n" + body
@@ -263,94 +415,147 @@ def normalize_string(s):
     """
     return " ".join(s.split())
 
-def extract_combined_markdown(pdf_path):
+def count_pdf_pages(pdf_source):
+    """
+    PDF의 전체 페이지 수를 반환합니다. pdf_source는 PDF 바이트 또는 파일 경로입니다.
+    """
+    with open_fitz(pdf_source) as doc:
+        return doc.page_count
+
+def extract_pdf_pages(pdf_source, page_numbers):
+    """
+    지정한 페이지(1부터 시작)만 남긴 PDF를 바이트로 반환합니다.
+    """
+    with open_fitz(pdf_source) as doc:
+        doc.select([n - 1 for n in page_numbers])
+        return doc.tobytes()
+
+# 페이지 번호 footer 패턴 (예: "Page 3", "Page 3 of 10")
+FOOTER_PATTERN = re.compile(r"^Page\s*\d+(\s*(of|/)\s*\d+)?\s*$", re.IGNORECASE)
+
+def extract_page_layout(page, page_num, text_items, table_strategy="lines", stats=None, margin=5):
+    """
+    pdfplumber 페이지에서 표(TableBlock)를 추출하고, 텍스트 요소(TextBlock) 중
+    표 영역에 포함된 것, 표 헤더와 중복되는 것, 페이지 번호 footer를 제외하여 페이지 레이아웃(Page)을 만듭니다.
+    """
+    tables = []
+    for table in find_tables(page, table_strategy, stats):
+        if not table:
+            continue
+        extracted_table = table.extract()
+        header_text = None
+        if extracted_table and len(extracted_table) > 0:
+            header_row = extracted_table[0]
+            header_text = " ".join(cell.strip() for cell in header_row if cell).strip()
+        tables.append(TableBlock.from_bbox(table.bbox, convert_table_to_markdown(extracted_table), header_text))
+    table_headers = {normalize_string(table.header) for table in tables if table.header is not None}
+
+    blocks = list(tables)
+    if tables:
+        inside_table = points_in_boxes(
+            [item.x for item in text_items],
+            [item.y for item in text_items],
+            [table.bbox for table in tables],
+            margin=margin,
+        )
+    else:
+        # 표가 없는 페이지는 공간 필터(좌표 배열 생성)를 건너뜁니다.
+        inside_table = [False] * len(text_items)
+    for item, in_table in zip(text_items, inside_table):
+        if in_table:
+            continue
+        content = item.content.strip()
+        if normalize_string(content) in table_headers:
+            continue
+        if FOOTER_PATTERN.match(content):
+            continue
+        blocks.append(item)
+    return Page(page_num, blocks)
+
+def render_page_section(layout):
+    """
+    페이지 레이아웃(Page)의 요소를 (y, x) 좌표 순으로 정렬하여 Markdown 조각 목록으로 만듭니다.
+    """
+    page_section = []
+    for block in layout.sorted_blocks(BY_Y_X):
+        if block.kind == "text":
+            page_section.append(process_text_item(block))
+        else:
+            page_section.append("\n" + block.content)
+    return page_section
+
+def extract_combined_markdown(pdf_source, table_strategy="lines", stats=None, page_numbers=None, bands=None):
     """
     PDF 파일을 처리하여,
-      1) LlamaMarkdownReader로 텍스트 추출 (헤더/푸터 제거)
-      2) pdfplumber로 표 및 OCR 텍스트 추출
+      1) pymupdf4llm으로 페이지별 텍스트 추출 (헤더/푸터 제거)
+      2) pdfplumber로 표 추출, pymupdf4llm 텍스트가 없는 페이지만 pdfplumber 텍스트/OCR로 대체
       3) 표 영역에 포함된 텍스트 및 중복되는 표 헤더 제거
       4) (y, x) 좌표 기준 원본 순서를 재현한 Markdown을 생성
+    table_strategy가 "lines"이면 선/사각형 객체가 없는 페이지는 표 탐지를 건너뛰고,
+    건너뛴 페이지 수를 stats에 기록합니다.
+    page_numbers(1부터 시작)를 지정하면 해당 페이지만 담은 PDF를 메모리에 만들어 그 페이지들만 처리합니다.
+    bands(PageBands, 원본 문서 전체에서 탐지)를 넘기면 모든 페이지에서 헤더/푸터 띠를 추출 전에 잘라냅니다.
+    pdf_source는 PDF 바이트, 파일 경로 또는 DocumentContext입니다.
+    PDF는 엔진(PyMuPDF, pdfplumber)별로 한 번만 열어 모든 단계가 공유하고, 끝나면 닫습니다.
     """
-    llama_text_items = extract_text_by_page_with_llama(pdf_path)
-    fallback_text_items = extract_text_from_pdfplumber_or_ocr(pdf_path)
-    footer_pattern = re.compile(r"^Page\s*\d+(\s*(of|/)\s*\d+)?\s*$", re.IGNORECASE)
+    if not isinstance(pdf_source, DocumentContext):
+        with DocumentContext(pdf_source) as document:
+            return extract_combined_markdown(document, table_strategy=table_strategy, stats=stats,
+                                             page_numbers=page_numbers, bands=bands)
+    document = pdf_source
+    if page_numbers is not None:
+        if not page_numbers:
+            return ""
+        subset = extract_pdf_pages(document.source, page_numbers)
+        return extract_combined_markdown(subset, table_strategy=table_strategy, stats=stats, bands=bands)
+
+    with stage("open"):
+        # 두 엔진으로 한 번씩만 열어 두고 이후 단계는 같은 문서/페이지 객체를 사용합니다.
+        document.fitz
+        document.pdfplumber
+    routes = None
+    if PAGE_ROUTING:
+        # 텍스트 레이어가 없는 페이지를 미리 찾아, fallback 단계에서 pdfplumber 추출 없이 바로 OCR로 보냅니다.
+        # (표본 페이지에 이미지만 있는 페이지가 없으면 분류하지 않습니다)
+        routes = plan_document_pages(document.fitz)
+        if routes is not None:
+            routes.record_stats(stats)
+    with stage("llama_text"):
+        llama_text_items = extract_text_by_page_with_llama(document, bands)
+    # fallback 텍스트는 pymupdf4llm 텍스트가 없는 페이지에서만 추출합니다.
+    # (해당 페이지 중 텍스트 레이어가 없는 페이지는 OCR 풀에서 한꺼번에 처리)
+    fallback_text_items = LazyFallbackText(document, bands, stats, routes)
+    page_count = len(document.pdfplumber.pages)
+    fallback_text_items.prefetch(n for n in range(1, page_count + 1) if not llama_text_items.get(n))
     markdown_parts = []
-    margin = 5
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            page_elements = []
-            if llama_text_items.get(page_num):
-                text_items = llama_text_items[page_num]
-            elif fallback_text_items.get(page_num):
-                text_items = fallback_text_items[page_num]
-            else:
-                text_items = []
-            
-            table_boxes = []
-            table_headers = []
-            tables = page.find_tables()
-            for table in tables:
-                if not table:
-                    continue
-                bbox = table.bbox
-                table_boxes.append(bbox)
-                extracted_table = table.extract()
-                md_table = convert_table_to_markdown(extracted_table)
-                if extracted_table and len(extracted_table) > 0:
-                    header_row = extracted_table[0]
-                    header_text = " ".join(cell.strip() for cell in header_row if cell).strip()
-                    table_headers.append(header_text)
-                page_elements.append({
-                    "type": "table",
-                    "content": "\n" + md_table,
-                    "x": bbox[0],
-                    "y": bbox[1]
-                })
-            
-            filtered_text_items = []
-            for item in text_items:
-                x, y = item.get("x", 0), item.get("y", 0)
-                inside_table = any(
-                    bbox[0] - margin <= x <= bbox[2] + margin and
-                    bbox[1] - margin <= y <= bbox[3] + margin
-                    for bbox in table_boxes
-                )
-                if inside_table:
-                    continue
-                content = item.get("content", "").strip()
-                normalized_content = normalize_string(content)
-                if any(normalize_string(header) == normalized_content for header in table_headers):
-                    continue
-                filtered_text_items.append(item)
-            
-            for item in filtered_text_items:
-                if footer_pattern.match(item.get("content", "").strip()):
-                    continue
-                page_elements.append(item)
-            
-            sorted_elements = sorted(page_elements, key=lambda e: (e["y"], e["x"]))
-            page_section = []
-            for element in sorted_elements:
-                if element["type"] == "text":
-                    page_section.append(process_text_item(element))
-                elif element["type"] == "table":
-                    page_section.append(element["content"])
-            if page_section:
-                markdown_parts.extend(page_section)
-                markdown_parts.append("\n---\n")
+
+    for page_num, page in enumerate(document.pdfplumber.pages, start=1):
+        if llama_text_items.get(page_num):
+            text_items = llama_text_items[page_num]
+        else:
+            text_items = fallback_text_items.get(page_num)
+
+        with stage("find_tables"):
+            layout = extract_page_layout(crop_page_bands(page, bands), page_num, text_items, table_strategy,
+                                         stats)
+        with stage("rendering"):
+            page_section = render_page_section(layout)
+        if page_section:
+            markdown_parts.extend(page_section)
+            markdown_parts.append("\n---\n")
     return "\n".join(markdown_parts)
 
 #####################
 # Word 파일 처리 함수
 #####################
 
-def convert_docx_to_markdown(docx_path):
+def convert_docx_to_markdown(docx_source):
     """
     python-docx를 사용하여 Word(.docx) 파일의 단락과 표를 Markdown 형식으로 변환합니다.
     단락의 스타일(Heading)과 bold 여부를 참고하여 제목(헤더) 처리를 합니다.
+    docx_source는 DOCX 바이트 또는 파일 경로입니다.
     """
-    document = Document(docx_path)
+    document = Document(as_file(docx_source))
     markdown_lines = []
     
     # 단락 처리
@@ -387,6 +592,47 @@ def convert_docx_to_markdown(docx_path):
 # Flask API 엔드포인트
 #####################
 
+SUPPORTED_EXTENSIONS = (".pdf", ".doc", ".docx")
+
+def convert_document(data, ext, cache_mode="use", table_strategy="lines", selection=None, crop_mode="fixed"):
+    """
+    업로드된 문서 하나(바이트 + 확장자)를 변환 결과 캐시를 거쳐 변환하고
+    {"markdown", "pages", "stats", "cache": "HIT"/"MISS"}를 반환합니다.
+    업로드가 PDF2MD_UPLOAD_SPOOL_BYTES 이하이면 디스크에 쓰지 않고 메모리에서 변환합니다.
+    crop_mode가 "detect"이면 PDF의 헤더/푸터 띠를 문서 단위로 탐지(캐시)하여 모든 페이지에서 잘라냅니다.
+    """
+    selection = selection or PageSelection()
+    if ext != ".pdf" and not selection.is_all():
+        raise ValueError("Page selection is only supported for PDF files")
+    stats = {}
+    with upload_source(data, ext) as source, DocumentContext(source) as document:
+        included_pages = None
+        if ext in [".pdf"]:
+            # 페이지 수를 셀 때 연 문서를 변환 단계에서도 그대로 사용합니다.
+            included_pages = selection.resolve(document.page_count)
+            page_numbers = None if selection.is_all() else included_pages
+            bands = detect_page_bands(source) if crop_mode == "detect" else None
+            converter = partial(extract_combined_markdown, document, table_strategy=table_strategy, stats=stats,
+                                page_numbers=page_numbers, bands=bands)
+            cache_options = {"engine": "docx2md.pdf", "table_strategy": table_strategy, "pages": page_numbers}
+            if bands is not None:
+                cache_options["bands"] = list(bands)
+        else:
+            converter = partial(convert_docx_to_markdown, source)
+            cache_options = {"engine": "docx2md.docx"}
+
+        cache_key = make_cache_key(data, **cache_options)
+        markdown, cache_hit = get_or_convert(conversion_cache, cache_key, converter, mode=cache_mode)
+        return {"markdown": markdown, "pages": included_pages, "stats": stats,
+                "cache": "HIT" if cache_hit else "MISS"}
+
+def convert_batch_item(name, data, cache_mode, table_strategy, selection, crop_mode="fixed"):
+    """
+    /convert/batch에서 파일 하나를 변환하는 워커 함수 (파일 이름의 확장자로 변환 방식을 고릅니다).
+    """
+    return convert_document(data, os.path.splitext(name.lower())[1], cache_mode, table_strategy, selection,
+                            crop_mode)
+
 @app.route("/convert", methods=["POST"])
 def convert_file_to_markdown():
     if "file" not in request.files:
@@ -395,27 +641,80 @@ def convert_file_to_markdown():
     if file.filename == "":
         return jsonify({"error": "Empty filename"}), 400
 
-    filename = file.filename.lower()
-    ext = os.path.splitext(filename)[1]
-    tmp_path = None
+    cache_mode = request.values.get("cache", "use")
+    if cache_mode not in CACHE_MODES:
+        return jsonify({"error": f"Unsupported cache mode (choose one of: {', '.join(CACHE_MODES)})"}), 400
+    table_strategy = request.values.get("table_strategy", "lines")
+    if table_strategy not in TABLE_STRATEGIES:
+        return jsonify({"error": f"Unsupported table strategy (choose one of: {', '.join(TABLE_STRATEGIES)})"}), 400
+    crop_mode = request.values.get("crop_mode", "fixed")
+    if crop_mode not in CROP_MODES:
+        return jsonify({"error": f"Unsupported crop mode (choose one of: {', '.join(CROP_MODES)})"}), 400
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-            file.save(tmp.name)
-            tmp_path = tmp.name
+        selection = PageSelection.from_values(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        if ext in [".pdf"]:
-            markdown = extract_combined_markdown(tmp_path)
-        elif ext in [".doc", ".docx"]:
-            markdown = convert_docx_to_markdown(tmp_path)
-        else:
-            return jsonify({"error": "Unsupported file type"}), 400
+    ext = os.path.splitext(file.filename.lower())[1]
+    if ext not in SUPPORTED_EXTENSIONS:
+        return jsonify({"error": "Unsupported file type"}), 400
+    if ext != ".pdf" and not selection.is_all():
+        return jsonify({"error": "Page selection is only supported for PDF files"}), 400
 
-        return jsonify({"markdown": markdown})
+    try:
+        result = convert_document(file.read(), ext, cache_mode, table_strategy, selection, crop_mode)
+        if result["pages"] is not None:
+            record_pages(len(result["pages"]))
+        response = jsonify({"markdown": result["markdown"], "pages": result["pages"], "stats": result["stats"]})
+        response.headers["X-Cache"] = result["cache"]
+        return response
+    except PageSelectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
+        record_error(e)
         return jsonify({"error": str(e)}), 500
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+
+@app.route("/convert/batch", methods=["POST"])
+def convert_batch_to_markdown():
+    """
+    여러 PDF/DOC/DOCX 파일(files 필드 여러 개 또는 zip 파일)을 한 번에 받아 파일 단위로 병렬 변환하고
+    (PDF2MD_BATCH_WORKERS), 끝나는 대로 파일별 결과를 NDJSON으로 스트리밍합니다.
+      - 성공: {"index", "file", "markdown", "pages", "stats", "cache"}
+      - 실패: {"index", "file", "error"} (다른 파일 변환은 계속 진행)
+      - 마지막 줄: {"done": true, "files": 파일 수, "failed": 실패 수}
+    /convert와 같은 cache/table_strategy/crop_mode/페이지 선택 옵션을 모든 PDF에 적용하며,
+    batch_workers로 동시에 변환할 파일 수를 지정할 수 있습니다.
+    """
+    uploads = request.files.getlist("files") + request.files.getlist("file")
+    if not uploads:
+        return jsonify({"error": "No file provided"}), 400
+
+    cache_mode = request.values.get("cache", "use")
+    if cache_mode not in CACHE_MODES:
+        return jsonify({"error": f"Unsupported cache mode (choose one of: {', '.join(CACHE_MODES)})"}), 400
+    table_strategy = request.values.get("table_strategy", "lines")
+    if table_strategy not in TABLE_STRATEGIES:
+        return jsonify({"error": f"Unsupported table strategy (choose one of: {', '.join(TABLE_STRATEGIES)})"}), 400
+    crop_mode = request.values.get("crop_mode", "fixed")
+    if crop_mode not in CROP_MODES:
+        return jsonify({"error": f"Unsupported crop mode (choose one of: {', '.join(CROP_MODES)})"}), 400
+    try:
+        selection = PageSelection.from_values(request.values)
+        items = collect_batch_files(uploads, SUPPORTED_EXTENSIONS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "Empty filename"}), 400
+
+    batch_workers = request.values.get("batch_workers", type=int)
+    return Response(stream_batch_ndjson(items, convert_batch_item,
+                                        args=(cache_mode, table_strategy, selection, crop_mode),
+                                        workers=batch_workers),
+                    mimetype="application/x-ndjson")
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"docx2md": conversion_cache.stats(), "ocr": ocr_cache.stats()})
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8021, debug=True)
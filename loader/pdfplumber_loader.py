@@ -2,13 +2,19 @@
 
 import pdfplumber
 
+from common.page_routing import PAGE_ROUTING, plan_pdf_pages
+
 def load_pdf(file_path: str) -> str:
     """
     pdfplumber를 사용하여 PDF 파일을 로드하고 전체 텍스트를 반환합니다.
+    텍스트 레이어가 없는 페이지(PyMuPDF 사전 분류 결과)는 추출을 시도하지 않고 건너뜁니다.
     """
+    routes = plan_pdf_pages(file_path) if PAGE_ROUTING else None
     text = ""
     with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
+        for index, page in enumerate(pdf.pages):
+            if routes is not None and routes.needs_ocr(index):
+                continue
             page_text = page.extract_text()
             if page_text:
                 text += page_text + "\n"
@@ -2,12 +2,18 @@
 
 from PyPDF2 import PdfReader
 
+from common.page_routing import PAGE_ROUTING, plan_pdf_pages
+
 def load_pdf(file_path: str) -> str:
     """
     PyPDF2를 사용하여 PDF 파일을 로드하고 전체 텍스트를 반환합니다.
+    텍스트 레이어가 없는 페이지(PyMuPDF 사전 분류 결과)는 추출을 시도하지 않고 건너뜁니다.
     """
+    routes = plan_pdf_pages(file_path) if PAGE_ROUTING else None
     reader = PdfReader(file_path)
     text = ""
-    for page in reader.pages:
+    for index, page in enumerate(reader.pages):
+        if routes is not None and routes.needs_ocr(index):
+            continue
         text += page.extract_text() or ""
     return text
@@ -1,63 +1,96 @@
 from flask import Flask, request, jsonify
+import io
 import os
-import tempfile
 import logging
 import pypandoc
 from pdf2docx import Converter
 
+from common.metrics import install_metrics, record_error, record_pages
+from common.page_selection import PageSelection, PageSelectionError
+from common.timing import stage
+from common.upload_source import open_fitz, upload_source
+
 app = Flask(__name__)
+# /metrics 엔드포인트 (PDF2MD_METRICS=1일 때 요청/단계 메트릭 수집)
+install_metrics(app, "pdf2docx2md")
 
 # 로깅 설정: INFO 레벨 이상 메시지 출력
 logging.basicConfig(level=logging.INFO)
 
-def pdf_to_docx(pdf_file: str, docx_file: str) -> None:
+def describe_source(source) -> str:
+    """
+    로그에 남길 입력 설명 (파일 경로 또는 메모리 버퍼 크기)을 반환합니다.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return f"<memory {len(source)} bytes>"
+    if isinstance(source, io.BytesIO):
+        return "<memory>"
+    return str(source)
+
+def count_pdf_pages(pdf_file) -> int:
+    """
+    PDF의 전체 페이지 수를 반환합니다. pdf_file은 PDF 바이트 또는 파일 경로입니다.
+    """
+    with open_fitz(pdf_file) as doc:
+        return doc.page_count
+
+def pdf_to_docx(pdf_file, docx_file, page_numbers: list = None) -> None:
     """
     PDF 파일을 DOCX 파일로 변환하는 함수.
     변환 과정에서 가능한 한 원본과 유사한 레이아웃을 보존하도록 합니다.
+    page_numbers(1부터 시작)를 지정하면 해당 페이지만 변환합니다.
+    pdf_file은 PDF 바이트 또는 파일 경로, docx_file은 파일 경로 또는 쓰기 가능한 파일 객체입니다.
     """
     try:
-        cv = Converter(pdf_file)
+        if isinstance(pdf_file, (bytes, bytearray)):
+            cv = Converter(stream=pdf_file)
+        else:
+            cv = Converter(pdf_file)
         # pdf2docx의 기본 옵션을 사용하되, 필요시 옵션을 추가하여 레이아웃 보존 효과를 높일 수 있습니다.
-        cv.convert(docx_file, start=0, end=None)
+        if page_numbers is None:
+            cv.convert(docx_file, start=0, end=None)
+        else:
+            cv.convert(docx_file, pages=[n - 1 for n in page_numbers])
         cv.close()
-        logging.info("PDF -> DOCX 변환 성공: %s -> %s", pdf_file, docx_file)
+        logging.info("PDF -> DOCX 변환 성공: %s -> %s", describe_source(pdf_file), describe_source(docx_file))
     except Exception as e:
         logging.error("PDF -> DOCX 변환 중 오류 발생: %s", e)
         raise e
 
-def convert_docx_to_markdown(docx_file: str) -> str:
+def convert_docx_to_markdown(docx_file) -> str:
     """
     DOCX 파일을 Markdown 형식의 텍스트로 변환하는 함수.
     Pandoc의 옵션을 활용하여 원본 DOCX의 구조와 레이아웃을 최대한 유지합니다.
+    docx_file이 바이트이면 임시 파일 없이 pandoc 표준 입력으로 전달합니다.
     """
     try:
         # Pandoc 옵션: 줄바꿈 보존 및 ATX 스타일 헤더 사용
         extra_args = ["--wrap=preserve", "--atx-headers"]
-        markdown_text = pypandoc.convert_file(docx_file, 'md', extra_args=extra_args)
-        logging.info("DOCX -> Markdown 변환 성공: %s", docx_file)
+        if isinstance(docx_file, (bytes, bytearray)):
+            markdown_text = pypandoc.convert_text(bytes(docx_file), 'md', format='docx', extra_args=extra_args)
+        else:
+            markdown_text = pypandoc.convert_file(docx_file, 'md', extra_args=extra_args)
+        logging.info("DOCX -> Markdown 변환 성공: %s", describe_source(docx_file))
     except Exception as e:
         logging.error("DOCX -> Markdown 변환 중 오류 발생: %s", e)
         raise Exception(f"DOCX -> Markdown 변환 중 오류 발생: {e}")
     return markdown_text
 
-def extract_combined_markdown(pdf_file: str) -> str:
+def extract_combined_markdown(pdf_file, page_numbers: list = None) -> str:
     """
     PDF 파일을 DOCX로 변환한 후, 변환된 DOCX 파일을 Markdown 형식의 텍스트로 변환하는 함수.
+    page_numbers(1부터 시작)를 지정하면 해당 페이지만 변환합니다.
+    중간 DOCX는 임시 파일 없이 메모리 버퍼로 주고받습니다.
     """
-    tmp_docx_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-            tmp_docx_path = tmp.name
-
-        # PDF -> DOCX 변환
-        pdf_to_docx(pdf_file, tmp_docx_path)
-        # DOCX -> Markdown 변환
-        markdown_text = convert_docx_to_markdown(tmp_docx_path)
-    finally:
-        if tmp_docx_path and os.path.exists(tmp_docx_path):
-            os.remove(tmp_docx_path)
-            logging.info("임시 DOCX 파일 삭제: %s", tmp_docx_path)
-    return markdown_text
+    if page_numbers is not None and not page_numbers:
+        return ""
+    # PDF -> DOCX 변환
+    docx_buffer = io.BytesIO()
+    with stage("pdf_to_docx"):
+        pdf_to_docx(pdf_file, docx_buffer, page_numbers)
+    # DOCX -> Markdown 변환
+    with stage("pandoc"):
+        return convert_docx_to_markdown(docx_buffer.getvalue())
 
 ###############################
 # Flask API 엔드포인트
@@ -71,30 +104,36 @@ def convert_file_to_markdown():
     if file.filename == "":
         return jsonify({"error": "빈 파일 이름입니다."}), 400
 
+    try:
+        selection = PageSelection.from_values(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     filename = file.filename.lower()
     ext = os.path.splitext(filename)[1]
-    tmp_path = None
+    if ext != ".pdf" and not selection.is_all():
+        return jsonify({"error": "페이지 선택은 PDF 파일에서만 지원됩니다."}), 400
+    if ext not in [".pdf", ".doc", ".docx"]:
+        return jsonify({"error": "지원되지 않는 파일 형식입니다."}), 400
     try:
-        # 업로드된 파일을 임시 파일로 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-            file.save(tmp.name)
-            tmp_path = tmp.name
-
-        if ext in [".pdf"]:
-            markdown = extract_combined_markdown(tmp_path)
-        elif ext in [".doc", ".docx"]:
-            markdown = convert_docx_to_markdown(tmp_path)
-        else:
-            return jsonify({"error": "지원되지 않는 파일 형식입니다."}), 400
+        # 업로드는 메모리에서 처리하고, PDF2MD_UPLOAD_SPOOL_BYTES를 넘는 경우에만 임시 파일로 저장
+        with upload_source(file.read(), ext) as source:
+            included_pages = None
+            if ext in [".pdf"]:
+                included_pages = selection.resolve(count_pdf_pages(source))
+                page_numbers = None if selection.is_all() else included_pages
+                record_pages(len(included_pages))
+                markdown = extract_combined_markdown(source, page_numbers)
+            else:
+                markdown = convert_docx_to_markdown(source)
 
-        return jsonify({"markdown": markdown})
+        return jsonify({"markdown": markdown, "pages": included_pages})
+    except PageSelectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error("파일 변환 중 오류 발생: %s", e)
+        record_error(e)
         return jsonify({"error": str(e)}), 500
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
-            logging.info("임시 업로드 파일 삭제: %s", tmp_path)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8021, debug=True)
@@ -1,10 +1,36 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import pdfplumber
+import bisect
+import hashlib
 import io
+import json
+import os
 import re
 import logging
+import threading
+from collections import namedtuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from common.band_detection import CROP_MODES, PageBands, band_clip, detect_page_bands
+from common.batch import collect_batch_files, stream_batch_ndjson
+from common.conversion_cache import CACHE_MODES, ConversionCache, get_or_convert, make_cache_key
+from common.jobs import JobDispatcher, JobQueue
+from common.layout import BY_Y, Page, TableBlock, TextBlock
+from common.metrics import flush_metrics, install_metrics, record_error, record_pages
+from common.page_routing import PAGE_ROUTING, plan_pdf_pages
+from common.page_selection import PageSelection, PageSelectionError
+from common.process_pool import spawn_process_pool
+from common.spatial_filter import points_in_boxes
+from common.table_detection import TABLE_STRATEGIES, count_stat, find_tables, has_fitz_ruling_graphics, merge_stats
+from common.timing import stage
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral
 
 app = Flask(__name__)
+# /metrics 엔드포인트 (PDF2MD_METRICS=1일 때 요청/단계 메트릭 수집)
+install_metrics(app, "pdf2md")
 
 ###############################
 # 상수 및 사전 컴파일된 정규표현식
@@ -13,6 +39,44 @@ app = Flask(__name__)
 # 헤더/푸터 제거 비율 (페이지 높이의 비율)
 HEADER_HEIGHT_RATIO = 0.1  # 상단 10%
 FOOTER_HEIGHT_RATIO = 0.1  # 하단 10%
+FIXED_BANDS = PageBands(HEADER_HEIGHT_RATIO, FOOTER_HEIGHT_RATIO)
+
+# 페이지 크롭 방식 (환경 변수 또는 요청 옵션 crop_mode로 선택)
+# - "fixed": 모든 문서에 위 고정 비율을 적용 (기본값)
+# - "detect": 문서마다 표본 페이지에서 반복되는 헤더/푸터 띠를 찾아 그 띠만 잘라냄 (문서 지문별로 캐시)
+CROP_MODE = os.environ.get("PDF2MD_CROP_MODE", "fixed")
+
+# 페이지 병렬 변환 설정 (환경 변수로 조정 가능)
+# - PARALLEL_WORKERS: 프로세스 풀 크기 (1 이하이면 단일 프로세스 직렬 처리)
+# - PARALLEL_CHUNK_SIZE: 한 작업 단위로 워커에 넘길 페이지 수
+PARALLEL_WORKERS = int(os.environ.get("PDF2MD_WORKERS", "1"))
+PARALLEL_CHUNK_SIZE = int(os.environ.get("PDF2MD_CHUNK_SIZE", "8"))
+
+# 저메모리 변환 모드 (환경 변수 또는 요청 옵션으로 활성화)
+# - 페이지 Markdown을 만든 직후 해당 페이지의 레이아웃 캐시를 해제하여 페이지 수와 무관하게 RSS를 일정하게 유지
+# - 완성된 페이지 Markdown은 결과 문자열로 모아 반환하므로, 결과 자체를 메모리에 두지 않으려면 stream=ndjson 응답을 사용
+LOW_MEMORY_MODE = os.environ.get("PDF2MD_LOW_MEMORY", "0") == "1"
+
+# 페이지 추출 엔진
+# - "pdfplumber": 기본 엔진 (pdfminer 기반)
+# - "pymupdf": PyMuPDF(fitz) 기반 고속 엔진. 같은 크롭 비율/표 단어 제외/라인 그룹화/y 정렬 규칙을 적용합니다.
+ENGINES = ("pdfplumber", "pymupdf")
+
+# 단어 -> 라인 그룹화 구현 선택: "columnar"(열 기반, 기본값) 또는 "legacy"(기존 dict 기반)
+LINE_GROUPING_MODE = os.environ.get("PDF2MD_LINE_GROUPING", "columnar")
+
+# /convert 결과 캐시 (업로드 바이트 해시 + 변환 옵션 기준)
+conversion_cache = ConversionCache("pdf2md")
+
+# 페이지 단위 증분 변환 캐시 (페이지 content stream/resources 지문 + 변환 옵션 기준)
+# 일부 페이지만 바뀐 개정본 문서는 바뀐 페이지만 다시 추출합니다.
+PAGE_CACHE_ENABLED = os.environ.get("PDF2MD_PAGE_CACHE", "1") == "1"
+page_cache = ConversionCache("pdf2md_pages")
+
+# 비동기 변환 작업 대기열 (/jobs). 대기열 파일, 디스패처 스레드, 백그라운드 프로세스 풀은 모두 첫 /jobs 요청 때 만듭니다.
+# (모듈을 import하기만 해서는 PDF2MD_JOBS_DIR에 디렉터리나 SQLite 파일을 만들지 않습니다)
+_job_dispatcher = None
+_job_lock = threading.Lock()
 
 # 기본 설정: 로그 레벨과 출력 포맷 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,10 +99,45 @@ def convert_table_to_markdown(table_data):
         md_lines.append("| " + " | ".join(row) + " |")
     return "\n".join(md_lines)
 
-def group_words_to_lines(words, threshold=3):
+class WordColumns(namedtuple("WordColumns", ["top", "x0", "text", "x1", "bottom"], defaults=(None, None))):
+    """
+    단어 목록을 열(column) 단위 배열로 담은 레이아웃.
+    top/x0(/x1/bottom)는 float64 numpy 배열, text는 같은 순서의 문자열 리스트입니다.
+    단어마다 dict를 만들지 않고 바로 group_words_to_lines()에 넘길 수 있습니다.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        pdfplumber extract_words() 형식의 dict 목록을 WordColumns로 변환합니다.
+        """
+        coords = np.array([(w["x0"], w["x1"], w["top"], w["bottom"]) for w in words],
+                          dtype=np.float64).reshape(-1, 4)
+        return cls(coords[:, 2], coords[:, 0], [w["text"] for w in words], coords[:, 1], coords[:, 3])
+
+    def centers(self):
+        """
+        단어 중심점 좌표 (cx, cy) 배열을 반환합니다.
+        """
+        return (self.x0 + self.x1) / 2, (self.top + self.bottom) / 2
+
+    def select(self, mask):
+        """
+        bool 배열 mask가 True인 단어만 남긴 WordColumns를 반환합니다.
+        """
+        return WordColumns(
+            self.top[mask],
+            self.x0[mask],
+            [t for t, keep in zip(self.text, mask.tolist()) if keep],
+            None if self.x1 is None else self.x1[mask],
+            None if self.bottom is None else self.bottom[mask],
+        )
+
+def _group_words_to_lines_legacy(words, threshold=3):
     """
     pdfplumber의 extract_words() 결과를 기준으로 y 좌표가 가까운 단어들을
-    하나의 라인으로 그룹화합니다.
+    하나의 라인으로 그룹화합니다. (dict 기반 기존 구현, 비교용)
     """
     if not words:
         return []
@@ -62,6 +161,62 @@ def group_words_to_lines(words, threshold=3):
         lines.append((current_top, line_text))
     return lines
 
+def _group_words_to_lines_columnar(columns, threshold=3):
+    """
+    WordColumns를 입력으로 기존 구현과 같은 라인을 만드는 열 기반 구현입니다.
+    - top 기준 안정 정렬 후, 각 라인의 시작 top에서 threshold 이내인 구간을 이분 탐색으로 찾고
+    - (라인 번호, x0) 기준 안정 정렬 한 번으로 라인 내부 순서를 정합니다.
+    """
+    n = len(columns.text)
+    if n == 0:
+        return []
+    order = np.argsort(columns.top, kind="stable")
+    sorted_tops = columns.top[order].tolist()
+
+    # 라인 경계 찾기: 기존 구현과 같은 부동소수점 비교(abs(top - current_top) <= threshold)를 유지하기 위해
+    # 이분 탐색 결과를 경계에서 한 번 더 보정합니다.
+    starts = []
+    start = 0
+    while start < n:
+        current_top = sorted_tops[start]
+        end = bisect.bisect_right(sorted_tops, current_top + threshold, lo=start + 1)
+        while end < n and abs(sorted_tops[end] - current_top) <= threshold:
+            end += 1
+        while end > start + 1 and abs(sorted_tops[end - 1] - current_top) > threshold:
+            end -= 1
+        starts.append(start)
+        start = end
+
+    bounds = starts + [n]
+    line_ids = np.repeat(np.arange(len(starts)), np.diff(bounds))
+    line_order = order[np.lexsort((columns.x0[order], line_ids))].tolist()
+    texts = columns.text
+    lines = []
+    for i, start in enumerate(starts):
+        line_text = " ".join(texts[j] for j in line_order[start:bounds[i + 1]])
+        lines.append((sorted_tops[start], line_text))
+    return lines
+
+def group_words_to_lines(words, threshold=3, mode=None):
+    """
+    pdfplumber의 extract_words() 결과를 기준으로 y 좌표가 가까운 단어들을
+    하나의 라인으로 그룹화합니다.
+    words에는 단어 dict 목록 또는 미리 만든 WordColumns를 넘길 수 있습니다.
+    mode: "columnar"(열 기반) / "legacy"(기존 dict 기반). 기본값은 LINE_GROUPING_MODE이며 결과는 같습니다.
+    """
+    mode = LINE_GROUPING_MODE if mode is None else mode
+    if mode == "legacy":
+        if isinstance(words, WordColumns):
+            words = [{"top": t, "x0": x, "text": txt}
+                     for t, x, txt in zip(words.top.tolist(), words.x0.tolist(), words.text)]
+        return _group_words_to_lines_legacy(words, threshold)
+    elif mode == "columnar":
+        if not isinstance(words, WordColumns):
+            words = WordColumns.from_words(words)
+        return _group_words_to_lines_columnar(words, threshold)
+    else:
+        raise ValueError("지원하지 않는 라인 그룹화 방식입니다. 'columnar' 또는 'legacy' 선택 가능.")
+
 def is_inside_bbox(x, y, bbox):
     """
     (x, y)가 bbox (x0, top, x1, bottom) 내부에 있는지 확인합니다.
@@ -69,71 +224,484 @@ def is_inside_bbox(x, y, bbox):
     x0, top, x1, bottom = bbox
     return (x0 <= x <= x1) and (top <= y <= bottom)
 
-def process_pdf_to_markdown(pdf_file):
+def extract_page_layout(page, table_strategy="lines", stats=None, bands=None):
+    """
+    pdfplumber 페이지 하나에서 레이아웃(Page)을 추출합니다.
+    헤더/푸터 영역을 잘라낸 뒤 표(TableBlock)와 텍스트 라인(TextBlock)을 추출합니다.
+    table_strategy가 "lines"이면 선/사각형 객체가 없는 페이지는 표 탐지를 건너뜁니다.
+    bands(PageBands)를 넘기면 고정 비율 대신 문서에서 탐지한 헤더/푸터 띠를 잘라냅니다.
+    """
+    with stage("crop"):
+        cropped_page = page.within_bbox(band_clip(page.width, page.height, bands or FIXED_BANDS))
+
+    # 표 객체 추출 (좌표 정보 포함)
+    tables = []
+    with stage("find_tables"):
+        for table in find_tables(cropped_page, table_strategy, stats):
+            try:
+                table_data = table.extract()
+                if table_data:
+                    tables.append(TableBlock.from_bbox(table.bbox, convert_table_to_markdown(table_data)))
+            except Exception:
+                continue
+
+    # 텍스트 객체 추출: extract_words()를 이용해 단어 단위 추출 후 라인별로 그룹화
+    # 단어는 열 단위 배열로 한 번만 변환하여 필터링과 라인 그룹화에 함께 사용합니다.
+    with stage("extract_words"):
+        words = WordColumns.from_words(cropped_page.extract_words())
+    return build_page_layout(page.page_number, tables, words)
+
+def extract_fitz_page_layout(page, table_strategy="lines", stats=None, bands=None):
+    """
+    PyMuPDF(fitz) 페이지 하나에서 extract_page_layout()과 같은 규칙으로 레이아웃(Page)을 추출합니다.
+    헤더/푸터 비율만큼 잘라낸 영역(clip) 안에서 표와 단어를 추출합니다.
+    table_strategy가 "lines"이면 잘라낸 영역에 선/사각형 그림이 하나도 없는 페이지만 표 탐지를 건너뜁니다.
+    """
+    with stage("crop"):
+        clip = fitz.Rect(*band_clip(page.rect.width, page.rect.height, bands or FIXED_BANDS))
+
+    tables = []
+    with stage("find_tables"):
+        if table_strategy == "lines" and not has_fitz_ruling_graphics(page, clip):
+            count_stat(stats, "table_detection_skipped")
+            found_tables = []
+        else:
+            count_stat(stats, "table_detection_run")
+            # use_layout=False: pymupdf.layout가 로드된 프로세스(pymupdf4llm import 등)에서도 레이아웃 모델로
+            # 표 후보를 거르지 않고, pdfplumber 엔진과 같은 선/텍스트 기반 탐지만 수행합니다.
+            found_tables = page.find_tables(clip=clip, strategy=table_strategy, use_layout=False).tables
+        for table in found_tables:
+            try:
+                table_data = table.extract()
+                if table_data:
+                    tables.append(TableBlock.from_bbox(table.bbox, convert_table_to_markdown(table_data)))
+            except Exception:
+                continue
+
+    # get_text("words") 결과: (x0, y0, x1, y1, 단어, 블록 번호, 라인 번호, 단어 번호)
+    with stage("extract_words"):
+        word_tuples = page.get_text("words", clip=clip)
+        coords = np.array([w[:4] for w in word_tuples], dtype=np.float64).reshape(-1, 4)
+        words = WordColumns(coords[:, 1], coords[:, 0], [w[4] for w in word_tuples], coords[:, 2], coords[:, 3])
+    return build_page_layout(page.number + 1, tables, words)
+
+def build_page_layout(page_number, tables, words):
+    """
+    표 목록(TableBlock)과 단어 열(WordColumns)로 한 페이지의 레이아웃(Page)을 만듭니다.
+    - 표 영역 안에 중심점이 있는 단어는 표 내용과 중복되므로 제외 (모든 단어 x 표를 한 번에 검사)
+    - 남은 단어를 라인으로 묶어 TextBlock으로 만듦 (라인 단위 블록은 x 좌표를 사용하지 않으므로 0)
+    """
+    with stage("grouping"):
+        if tables:
+            cx, cy = words.centers()
+            words = words.select(~points_in_boxes(cx, cy, [t.bbox for t in tables]))
+        text_blocks = [TextBlock(0, y, txt) for y, txt in group_words_to_lines(words)]
+    return Page(page_number, text_blocks + tables)
+
+def render_page_markdown(layout):
+    """
+    페이지 레이아웃(Page)을 Markdown으로 만듭니다.
+    텍스트와 표를 y 좌표 기준으로 정렬하여 원본 순서를 재현하며, 표는 앞뒤에 빈 줄을 둡니다.
+    """
+    with stage("rendering"):
+        page_lines = []
+        for block in layout.sorted_blocks(BY_Y):
+            if block.kind == "text":
+                page_lines.append(block.content)
+            else:
+                page_lines.append("\n" + block.content + "\n")
+        return "\n".join(page_lines)
+
+def page_to_markdown(page, table_strategy="lines", stats=None, bands=None):
+    """
+    pdfplumber 페이지 하나를 Markdown 문자열로 변환합니다.
+    헤더/푸터 영역을 잘라낸 뒤 표와 텍스트 라인을 추출하고,
+    위쪽 좌표 기준으로 정렬하여 원본 순서를 최대한 재현합니다.
+    """
+    return render_page_markdown(extract_page_layout(page, table_strategy, stats, bands))
+
+def fitz_page_to_markdown(page, table_strategy="lines", stats=None, bands=None):
+    """
+    PyMuPDF(fitz) 페이지 하나를 page_to_markdown()과 같은 규칙으로 Markdown 문자열로 변환합니다.
+    """
+    return render_page_markdown(extract_fitz_page_layout(page, table_strategy, stats, bands))
+
+def _hash_pdf_object(obj, hasher, memo):
+    """
+    pdfminer 객체(dict, list, stream, 참조 등)를 재귀적으로 해시에 반영합니다.
+    간접 참조는 objid별로 한 번만 해시하여 memo에 보관하므로, 여러 페이지가 공유하는
+    폰트/이미지 리소스는 문서당 한 번만 읽습니다.
+    """
+    if isinstance(obj, PDFObjRef):
+        digest = memo.get(obj.objid)
+        if digest is None:
+            memo[obj.objid] = b"cycle"  # 순환 참조 방지
+            sub = hashlib.sha256()
+            _hash_pdf_object(obj.resolve(), sub, memo)
+            digest = sub.digest()
+            memo[obj.objid] = digest
+        hasher.update(b"R" + digest)
+    elif isinstance(obj, PDFStream):
+        hasher.update(b"S")
+        _hash_pdf_object(obj.attrs, hasher, memo)
+        hasher.update(obj.get_data())
+    elif isinstance(obj, dict):
+        hasher.update(b"D")
+        for key in sorted(obj):
+            hasher.update(str(key).encode("utf-8"))
+            _hash_pdf_object(obj[key], hasher, memo)
+        hasher.update(b"d")
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(b"L")
+        for item in obj:
+            _hash_pdf_object(item, hasher, memo)
+        hasher.update(b"l")
+    elif isinstance(obj, PSLiteral):
+        hasher.update(b"N" + str(obj.name).encode("utf-8"))
+    elif isinstance(obj, bytes):
+        hasher.update(b"B" + obj)
+    else:
+        hasher.update(repr(obj).encode("utf-8"))
+
+def page_fingerprint(page, memo=None, **options):
+    """
+    페이지의 content stream, resources, 페이지 크기/회전과 변환 옵션(헤더/푸터 비율, 표 탐지 방식 등)으로
+    페이지 지문(hex 문자열)을 계산합니다. 같은 지문이면 같은 Markdown이 나옵니다.
+    memo는 문서 하나 안에서 공유 리소스 해시를 재사용하기 위한 dict입니다.
+    """
+    memo = {} if memo is None else memo
+    page_obj = page.page_obj
+    hasher = hashlib.sha256()
+    _hash_pdf_object([page_obj.mediabox, page_obj.cropbox, page_obj.rotate], hasher, memo)
+    for stream in page_obj.contents:
+        _hash_pdf_object(stream, hasher, memo)
+    _hash_pdf_object(page_obj.resources, hasher, memo)
+    return make_cache_key(hasher.digest(), scope="page", **options)
+
+def convert_page(page, cache_mode="use", memo=None, table_strategy="lines", stats=None, bands=None):
+    """
+    페이지 지문으로 페이지 캐시를 조회하고, 없을 때만 표/단어 추출을 거쳐 Markdown으로 변환합니다.
+    """
+    if not PAGE_CACHE_ENABLED or cache_mode == "bypass":
+        return page_to_markdown(page, table_strategy, stats, bands)
+    with stage("fingerprint"):
+        fingerprint = page_fingerprint(page, memo, **conversion_cache_options(table_strategy, engine="pdfplumber",
+                                                                              bands=bands))
+    page_markdown, cache_hit = get_or_convert(page_cache, fingerprint,
+                                              lambda: page_to_markdown(page, table_strategy, stats, bands),
+                                              mode=cache_mode)
+    if cache_hit:
+        count_stat(stats, "page_cache_hits")
+    return page_markdown
+
+def read_pdf_bytes(pdf_file):
+    """
+    경로(str), 바이트열, 파일 객체(Flask FileStorage 포함) 형태의 입력을 바이트열로 읽어 반환합니다.
+    """
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    return pdf_file.read()
+
+# 워커 프로세스마다 한 번만 전달받아 보관하는 PDF 원본 바이트
+_worker_pdf_bytes = None
+
+def _init_page_worker(pdf_bytes):
+    global _worker_pdf_bytes
+    _worker_pdf_bytes = pdf_bytes
+
+def _iter_converted_pages(pdf_file, page_numbers=None, engine="pdfplumber", cache_mode="use",
+                          table_strategy="lines", stats=None, low_memory=False, bands=None, routes=None):
+    """
+    한 프로세스 안에서 지정된 페이지(None이면 전체)를 선택한 엔진으로 변환하여
+    (페이지 번호, Markdown) 튜플을 순서대로 반환(yield)합니다.
+    bands는 문서 단위 헤더/푸터 띠입니다 (None이면 고정 비율).
+    routes(RoutingPlan)를 넘기면 텍스트 레이어와 벡터 그림이 모두 없는 페이지는 추출하지 않고 빈 Markdown을 돌려줍니다.
+    pymupdf 엔진은 페이지 단위 캐시(pdfminer 객체 기반 지문)를 사용하지 않습니다.
+    """
+    if engine == "pymupdf":
+        with stage("open"):
+            doc = fitz.open(stream=read_pdf_bytes(pdf_file), filetype="pdf")
+        with doc:
+            if page_numbers is None:
+                page_numbers = range(1, doc.page_count + 1)
+            for page_number in page_numbers:
+                if page_number > doc.page_count:
+                    continue
+                if routes is not None and routes.has_no_content(page_number - 1):
+                    count_stat(stats, "pages_skipped")
+                    yield page_number, ""
+                    continue
+                yield page_number, fitz_page_to_markdown(doc[page_number - 1], table_strategy, stats, bands)
+        return
+
+    memo = {}
+    with stage("open"):
+        pdf = pdfplumber.open(pdf_file, pages=page_numbers)
+    with pdf:
+        for page in pdf.pages:
+            if routes is not None and routes.has_no_content(page.page_number - 1):
+                count_stat(stats, "pages_skipped")
+                yield page.page_number, ""
+                continue
+            page_markdown = convert_page(page, cache_mode, memo, table_strategy, stats, bands)
+            if low_memory:
+                page.close()
+            yield page.page_number, page_markdown
+
+def _convert_page_range(page_numbers, engine="pdfplumber", cache_mode="use", table_strategy="lines",
+                        low_memory=False, bands=None, routes=None):
+    """
+    워커 프로세스에서 지정된 페이지 번호(1부터 시작) 범위만 열어 Markdown으로 변환합니다.
+    반환값: ([(페이지 번호, Markdown), ...], 통계 dict)
+    """
+    stats = {}
+    pages = list(_iter_converted_pages(io.BytesIO(_worker_pdf_bytes), page_numbers, engine, cache_mode,
+                                       table_strategy, stats, low_memory, bands, routes))
+    # 워커 프로세스는 요청을 처리하지 않으므로, 여기서 측정한 단계 시간을 직접 스냅샷에 씁니다.
+    flush_metrics()
+    return pages, stats
+
+def count_pdf_pages(pdf_file):
+    """
+    PDF의 전체 페이지 수를 반환합니다. (페이지 내용은 파싱하지 않습니다.)
+    """
+    with pdfplumber.open(pdf_file) as pdf:
+        return len(pdf.pages)
+
+def resolve_page_bands(pdf_bytes, crop_mode=None):
+    """
+    crop_mode에 따라 문서에 적용할 헤더/푸터 띠(PageBands)를 반환합니다.
+    "fixed"이면 None(고정 비율 HEADER_HEIGHT_RATIO/FOOTER_HEIGHT_RATIO)을, "detect"이면 탐지 결과를 반환합니다.
+    """
+    crop_mode = CROP_MODE if crop_mode is None else crop_mode
+    if crop_mode not in CROP_MODES:
+        raise ValueError(f"지원하지 않는 crop_mode입니다. {', '.join(CROP_MODES)} 중 선택 가능.")
+    if crop_mode == "fixed":
+        return None
+    return detect_page_bands(pdf_bytes)
+
+def iter_pdf_pages_markdown(pdf_file, workers=None, chunk_size=None, cache_mode="use",
+                            table_strategy="lines", stats=None, low_memory=None, page_numbers=None,
+                            engine="pdfplumber", crop_mode=None):
+    """
+    PDF의 각 페이지를 Markdown으로 변환하여 (페이지 번호, Markdown) 튜플을 페이지 순서대로 반환(yield)합니다.
+    workers가 2 이상이면 페이지를 chunk_size 단위 범위로 나누어 프로세스 풀에서 병렬로 변환하고,
+    결과는 원래 페이지 순서대로 돌려줍니다.
+    cache_mode는 페이지 단위 캐시 사용 방식입니다 ("use" / "bypass" / "refresh").
+    stats dict를 넘기면 표 탐지 생략/실행 페이지 수, 페이지 캐시 적중 수, 페이지 종류별 수(PDF2MD_PAGE_ROUTING)를 기록합니다.
+    low_memory가 참이면 페이지를 변환한 직후 pdfplumber 페이지 캐시(레이아웃 객체 등)를 해제합니다.
+    page_numbers(1부터 시작하는 페이지 번호 리스트)를 지정하면 해당 페이지만 열어 변환합니다.
+    engine: "pdfplumber"(기본값) / "pymupdf"
+    crop_mode: "fixed"(고정 비율 크롭) / "detect"(문서별 헤더/푸터 띠 탐지 후 크롭). None이면 PDF2MD_CROP_MODE
+    """
+    low_memory = LOW_MEMORY_MODE if low_memory is None else low_memory
+    crop_mode = CROP_MODE if crop_mode is None else crop_mode
+    if crop_mode not in CROP_MODES:
+        raise ValueError(f"지원하지 않는 crop_mode입니다. {', '.join(CROP_MODES)} 중 선택 가능.")
+    if table_strategy not in TABLE_STRATEGIES:
+        raise ValueError(f"지원하지 않는 표 탐지 방식입니다. {', '.join(TABLE_STRATEGIES)} 중 선택 가능.")
+    if engine not in ENGINES:
+        raise ValueError(f"지원하지 않는 엔진입니다. {', '.join(ENGINES)} 중 선택 가능.")
+    workers = PARALLEL_WORKERS if workers is None else workers
+    chunk_size = PARALLEL_CHUNK_SIZE if chunk_size is None else chunk_size
+    if chunk_size < 1:
+        raise ValueError("chunk_size는 1 이상이어야 합니다.")
+
+    bands = None
+    routes = None
+    if crop_mode != "fixed" or PAGE_ROUTING:
+        pdf_file = io.BytesIO(read_pdf_bytes(pdf_file))
+    if crop_mode != "fixed":
+        # 헤더/푸터 띠는 문서 전체에서 한 번만 탐지하여 모든 페이지(워커 포함)에 같은 크롭을 적용합니다.
+        bands = resolve_page_bands(pdf_file.getvalue(), crop_mode)
+    if PAGE_ROUTING:
+        # 변환 전에 PyMuPDF로 페이지를 분류하여, 추출 결과가 반드시 비는 페이지(스캔 이미지만 있는 페이지 등)는
+        # pdfplumber로 파싱하지 않습니다. (이 서비스는 OCR을 하지 않으므로 해당 페이지는 빈 Markdown)
+        # 표본 페이지에 이미지만 있는 페이지가 없으면 분류하지 않습니다 (routes는 None).
+        routes = plan_pdf_pages(pdf_file.getvalue(),
+                                None if page_numbers is None else [number - 1 for number in page_numbers])
+        if routes is not None:
+            routes.record_stats(stats)
+
+    if workers <= 1:
+        yield from _iter_converted_pages(pdf_file, page_numbers, engine, cache_mode, table_strategy, stats,
+                                         low_memory, bands, routes)
+        return
+
+    pdf_bytes = read_pdf_bytes(pdf_file)
+    if page_numbers is None:
+        page_numbers = list(range(1, count_pdf_pages(io.BytesIO(pdf_bytes)) + 1))
+    ranges = [page_numbers[start:start + chunk_size] for start in range(0, len(page_numbers), chunk_size)]
+    if not ranges:
+        return
+    with spawn_process_pool(min(workers, len(ranges)), initializer=_init_page_worker,
+                            initargs=(pdf_bytes,)) as executor:
+        futures = [executor.submit(_convert_page_range, r, engine, cache_mode, table_strategy, low_memory, bands,
+                                   routes)
+                   for r in ranges]
+        for future in futures:
+            pages, range_stats = future.result()
+            merge_stats(stats, range_stats)
+            for page_number, page_markdown in pages:
+                yield page_number, page_markdown
+
+def process_pdf_to_markdown(pdf_file, workers=None, chunk_size=None, cache_mode="use",
+                            table_strategy="lines", stats=None, low_memory=None, page_numbers=None,
+                            engine="pdfplumber", crop_mode=None):
     """
     PDF 파일의 각 페이지에서 헤더/푸터 영역을 제거한 후,
     텍스트와 표 객체를 좌표 기반으로 추출하여 Markdown 형식 문자열로 변환합니다.
     텍스트와 표가 혼합된 경우, 페이지 내에서 위쪽 좌표 기준 정렬을 하여 원본 순서를 최대한 재현합니다.
     각 페이지의 내용은 구분자 '---'로 연결됩니다.
+    workers/chunk_size를 지정하면 페이지 범위 단위로 병렬 변환하며, 결과는 직렬 처리와 동일합니다.
+    지문이 같은 페이지는 페이지 캐시의 결과를 재사용합니다 (cache_mode로 조정).
+    table_strategy: "lines"(선 기반, 괘선 없는 페이지는 표 탐지 생략) / "text"(텍스트 정렬 기반)
+    low_memory가 참이면 페이지별 캐시를 즉시 해제합니다.
+    page_numbers를 지정하면 해당 페이지(1부터 시작)만 변환합니다.
+    engine: "pdfplumber"(기본값) / "pymupdf"(PyMuPDF 기반 고속 엔진)
+    crop_mode: "fixed"(고정 비율 크롭) / "detect"(문서별 헤더/푸터 띠 탐지 후 크롭)
     """
-    page_contents = []
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            width, height = page.width, page.height
-            crop_top = height * HEADER_HEIGHT_RATIO
-            crop_bottom = height * (1 - FOOTER_HEIGHT_RATIO)
-            cropped_page = page.within_bbox((0, crop_top, width, crop_bottom))
-            
-            # 표 객체 추출 (좌표 정보 포함)
-            tables = []
-            for table in cropped_page.find_tables():
-                try:
-                    table_data = table.extract()
-                    if table_data:
-                        md_table = convert_table_to_markdown(table_data)
-                        tables.append({
-                            "type": "table",
-                            "y": table.bbox[1],
-                            "content": md_table,
-                            "bbox": table.bbox
-                        })
-                except Exception:
-                    continue
-
-            # 텍스트 객체 추출: extract_words()를 이용해 단어 단위 추출 후 라인별로 그룹화
-            words = cropped_page.extract_words()
-            filtered_words = []
-            for w in words:
-                cx = (float(w["x0"]) + float(w["x1"])) / 2
-                cy = (float(w["top"]) + float(w["bottom"])) / 2
-                inside_table = False
-                for t in tables:
-                    if is_inside_bbox(cx, cy, t["bbox"]):
-                        inside_table = True
-                        break
-                if not inside_table:
-                    filtered_words.append(w)
-            text_lines = group_words_to_lines(filtered_words)
-            text_objects = [{"type": "text", "y": y, "content": txt} for y, txt in text_lines]
-
-            # 텍스트와 표를 y 좌표 기준으로 합쳐 원본 순서를 재현
-            all_objects = text_objects + tables
-            all_objects = sorted(all_objects, key=lambda obj: obj["y"])
-            page_lines = []
-            for obj in all_objects:
-                if obj["type"] == "text":
-                    page_lines.append(obj["content"])
-                elif obj["type"] == "table":
-                    page_lines.append("\n" + obj["content"] + "\n")
-            page_contents.append("\n".join(page_lines))
+    page_contents = (
+        page_markdown
+        for _, page_markdown in iter_pdf_pages_markdown(pdf_file, workers=workers, chunk_size=chunk_size,
+                                                        cache_mode=cache_mode, table_strategy=table_strategy,
+                                                        stats=stats, low_memory=low_memory,
+                                                        page_numbers=page_numbers, engine=engine,
+                                                        crop_mode=crop_mode)
+    )
     # 각 페이지를 '---' 구분자로 연결하여 반환
     return "\n---\n".join(page_contents)
 
+def conversion_cache_options(table_strategy="lines", engine="pdfplumber", bands=None, **extra):
+    """
+    변환 결과에 영향을 주는 설정값들을 반환합니다. 캐시 키에 함께 포함됩니다.
+    (workers/chunk_size처럼 결과를 바꾸지 않는 값은 포함하지 않습니다.)
+    bands는 실제로 적용하는 헤더/푸터 띠(None이면 고정 비율)이며,
+    extra에는 문서 단위 옵션(변환할 페이지 목록 등)을 넘깁니다.
+    문서 단위 캐시 키는 bands 대신 crop_mode를 넘깁니다 (띠는 PDF 바이트와 crop_mode로 정해지므로,
+    캐시를 조회하기 전에 띠를 탐지하지 않아도 됩니다).
+    """
+    bands = bands or FIXED_BANDS
+    return {
+        "engine": f"pdf2md.{engine}",
+        "header_ratio": bands.header_ratio,
+        "footer_ratio": bands.footer_ratio,
+        "table_strategy": table_strategy,
+        **extra,
+    }
+
+def request_flag(name, values=None):
+    """
+    요청 값(form/query)의 참/거짓 옵션을 읽습니다. 값이 없으면 None(기본 설정 사용)을 반환합니다.
+    """
+    value = (request.values if values is None else values).get(name)
+    if value is None or value == "":
+        return None
+    return value.lower() in ("1", "true", "yes", "on")
+
+def parse_conversion_options(values):
+    """
+    요청 값(form/query)에서 변환 옵션을 읽어
+    (process_pdf_to_markdown()/iter_pdf_pages_markdown()에 넘길 키워드 인자 dict, PageSelection)을 반환합니다.
+    지원하지 않는 값이 있으면 ValueError를 발생시킵니다.
+    """
+    options = {
+        # 병렬 워커 수와 페이지 묶음 크기 (없거나 숫자가 아니면 기본 설정 사용)
+        "workers": values.get("workers", type=int),
+        "chunk_size": values.get("chunk_size", type=int),
+        "cache_mode": values.get("cache", "use"),
+        "table_strategy": values.get("table_strategy", "lines"),
+        "engine": values.get("engine", "pdfplumber"),
+        "low_memory": request_flag("low_memory", values),
+        "crop_mode": values.get("crop_mode", CROP_MODE),
+    }
+    if options["cache_mode"] not in CACHE_MODES:
+        raise ValueError(f"지원하지 않는 cache 모드입니다. {', '.join(CACHE_MODES)} 중 선택 가능.")
+    if options["table_strategy"] not in TABLE_STRATEGIES:
+        raise ValueError(f"지원하지 않는 표 탐지 방식입니다. {', '.join(TABLE_STRATEGIES)} 중 선택 가능.")
+    if options["engine"] not in ENGINES:
+        raise ValueError(f"지원하지 않는 엔진입니다. {', '.join(ENGINES)} 중 선택 가능.")
+    if options["crop_mode"] not in CROP_MODES:
+        raise ValueError(f"지원하지 않는 crop_mode입니다. {', '.join(CROP_MODES)} 중 선택 가능.")
+    return options, PageSelection.from_values(values)
+
+def stream_pdf_pages_ndjson(pdf_bytes, workers=None, chunk_size=None, cache_mode="use", table_strategy="lines",
+                            low_memory=None, page_numbers=None, engine="pdfplumber", crop_mode=None):
+    """
+    페이지 변환이 끝나는 대로 {"page": 번호, "markdown": 내용} 레코드를 한 줄씩(NDJSON) 내보내고,
+    마지막에 요약 레코드 {"done": true, "pages": 페이지 수, "stats": 통계}를 내보냅니다.
+    변환 도중 오류가 나면 {"error": 메시지} 레코드로 스트림을 끝냅니다.
+    """
+    page_count = 0
+    stats = {}
+    try:
+        for page_number, page_markdown in iter_pdf_pages_markdown(
+                io.BytesIO(pdf_bytes), workers=workers, chunk_size=chunk_size, cache_mode=cache_mode,
+                table_strategy=table_strategy, stats=stats, low_memory=low_memory, page_numbers=page_numbers,
+                engine=engine, crop_mode=crop_mode):
+            page_count += 1
+            yield json.dumps({"page": page_number, "markdown": page_markdown}, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logging.exception("스트리밍 변환 중 오류 발생")
+        yield json.dumps({"error": str(e), "pages": page_count}, ensure_ascii=False) + "\n"
+        return
+    yield json.dumps({"done": True, "pages": page_count, "stats": stats}) + "\n"
+
+def convert_pdf_document(pdf_bytes, options, selection):
+    """
+    PDF 바이트 하나를 (변환 결과 캐시를 거쳐) 변환하여
+    {"markdown", "pages": 포함된 페이지 번호 목록, "stats", "cache": "HIT"/"MISS"}를 반환합니다.
+    options는 parse_conversion_options()가 만든 키워드 인자 dict, selection은 PageSelection입니다.
+    캐시 키는 PDF 바이트, 변환 옵션(crop_mode 포함), 페이지 선택 조건만으로 만들므로, 캐시 적중 시에는
+    PDF를 열지 않습니다 (페이지 수 확인과 헤더/푸터 띠 탐지는 캐시 미스일 때 변환 과정에서 한 번만 수행).
+    """
+    stats = {}
+
+    def convert():
+        included_pages = selection.resolve(count_pdf_pages(io.BytesIO(pdf_bytes)))
+        # 페이지 제한이 없으면 None을 넘겨 전체 페이지를 그대로 엽니다.
+        page_numbers = None if selection.is_all() else included_pages
+        markdown_text = process_pdf_to_markdown(io.BytesIO(pdf_bytes), stats=stats, page_numbers=page_numbers,
+                                                **options)
+        return json.dumps({"markdown": markdown_text, "pages": included_pages}, ensure_ascii=False)
+
+    cache_key = make_cache_key(pdf_bytes, **conversion_cache_options(options["table_strategy"], options["engine"],
+                                                                     crop_mode=options["crop_mode"],
+                                                                     selection=selection.cache_key()))
+    value, cache_hit = get_or_convert(conversion_cache, cache_key, convert, mode=options["cache_mode"])
+    result = json.loads(value)
+    return {"markdown": result["markdown"], "pages": result["pages"], "stats": stats,
+            "cache": "HIT" if cache_hit else "MISS"}
+
+def convert_batch_item(name, pdf_bytes, options, selection):
+    """
+    /convert/batch에서 파일 하나를 변환하는 워커 함수 (프로세스 풀로 전달).
+    """
+    return convert_pdf_document(pdf_bytes, options, selection)
+
 @app.route('/convert', methods=['POST'])
 def convert_pdf_endpoint():
     """
     PDF 파일을 POST로 업로드하면, PDF의 텍스트와 표를 추출하여 Markdown 형식 문자열을
     JSON으로 반환합니다. 페이지 구분자는 '---'입니다.
+    선택 form 필드:
+      - workers: 병렬 변환에 사용할 프로세스 수 (기본값: PDF2MD_WORKERS)
+      - chunk_size: 워커 한 작업당 페이지 수 (기본값: PDF2MD_CHUNK_SIZE)
+      - stream: "ndjson"이면 페이지가 끝나는 대로 NDJSON 레코드를 스트리밍으로 반환
+      - cache: "use"(기본값) / "bypass"(캐시 미사용) / "refresh"(다시 변환하여 캐시 갱신)
+      - table_strategy: "lines"(기본값, 괘선 없는 페이지는 표 탐지 생략) / "text"(텍스트 정렬 기반 표 탐지)
+      - low_memory: "1"이면 페이지별 캐시를 즉시 해제하는 저메모리 모드로 변환 (기본값: PDF2MD_LOW_MEMORY)
+      - pages: 변환할 페이지 지정 (예: "1-5,10", 문서 끝을 넘는 부분은 잘라내고, 문서 끝 뒤에서 시작하는 범위는 400)
+      - first_n: 앞에서부터 N 페이지만 변환
+      - max_pages: 선택된 페이지 중 최대 N 페이지만 변환
+      - engine: "pdfplumber"(기본값) / "pymupdf"(PyMuPDF 기반 고속 엔진)
+      - crop_mode: "fixed"(기본값, 상/하단 고정 비율 제거) / "detect"(표본 페이지에서 반복되는 헤더/푸터 띠를 찾아 제거)
+    응답의 pages에는 실제로 변환에 포함된 페이지 번호 목록이,
+    stats에는 표 탐지를 건너뛴 페이지 수 등 요청별 통계가 담깁니다.
+    캐시 적중 여부는 X-Cache 응답 헤더(HIT/MISS)로 알려줍니다. cache 옵션은 페이지 단위 캐시에도 적용됩니다.
     """
     if 'file' not in request.files:
         return jsonify({"error": "파일이 제공되지 않았습니다."}), 400
@@ -142,12 +710,188 @@ def convert_pdf_endpoint():
     if file.filename == '':
         return jsonify({"error": "선택된 파일이 없습니다."}), 400
     
+    stream = request.values.get("stream", "")
+    if stream and stream != "ndjson":
+        return jsonify({"error": "지원하지 않는 stream 형식입니다. 'ndjson'만 선택 가능."}), 400
     try:
-        markdown_text = process_pdf_to_markdown(file)
-        return jsonify({"markdown": markdown_text})
+        options, selection = parse_conversion_options(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 요청 컨텍스트가 끝나도 스트리밍할 수 있도록 업로드 내용을 먼저 읽어 둡니다.
+    pdf_bytes = file.read()
+
+    if stream:
+        try:
+            included_pages = selection.resolve(count_pdf_pages(io.BytesIO(pdf_bytes)))
+        except PageSelectionError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            record_error(e)
+            return jsonify({"error": str(e)}), 500
+        record_pages(len(included_pages))
+        # 페이지 제한이 없으면 None을 넘겨 전체 페이지를 그대로 엽니다.
+        page_numbers = None if selection.is_all() else included_pages
+        return Response(stream_pdf_pages_ndjson(pdf_bytes, page_numbers=page_numbers, **options),
+                        mimetype="application/x-ndjson")
+
+    try:
+        result = convert_pdf_document(pdf_bytes, options, selection)
+        record_pages(len(result["pages"]))
+        response = jsonify({"markdown": result["markdown"], "pages": result["pages"], "stats": result["stats"]})
+        response.headers["X-Cache"] = result["cache"]
+        return response
+    except PageSelectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
+        record_error(e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/convert/batch', methods=['POST'])
+def convert_batch_endpoint():
+    """
+    여러 PDF 파일(files 필드에 여러 개) 또는 PDF를 담은 zip 파일을 한 번에 받아
+    파일 단위로 프로세스 풀(PDF2MD_BATCH_WORKERS)에서 병렬 변환하고,
+    끝나는 대로 파일별 결과를 NDJSON으로 스트리밍합니다.
+      - 성공: {"index", "file", "markdown", "pages", "stats", "cache"}
+      - 실패: {"index", "file", "error"} (다른 파일 변환은 계속 진행)
+      - 마지막 줄: {"done": true, "files": 파일 수, "failed": 실패 수}
+    index는 업로드(zip 내부 포함) 순서이며, 결과는 변환이 끝난 순서로 전달됩니다.
+    /convert와 같은 form 옵션을 모든 파일에 적용합니다. (파일 내부 페이지 병렬화 workers는 사용하지 않음)
+    선택 form 필드:
+      - batch_workers: 동시에 변환할 파일 수 (기본값: PDF2MD_BATCH_WORKERS)
+    """
+    uploads = request.files.getlist("files") + request.files.getlist("file")
+    if not uploads:
+        return jsonify({"error": "파일이 제공되지 않았습니다."}), 400
+    try:
+        options, selection = parse_conversion_options(request.values)
+        items = collect_batch_files(uploads, (".pdf",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "선택된 파일이 없습니다."}), 400
+    # 파일 단위로 병렬 변환하므로 파일 내부는 직렬로 변환합니다.
+    options.update(workers=1)
+    batch_workers = request.values.get("batch_workers", type=int)
+    return Response(stream_batch_ndjson(items, convert_batch_item, args=(options, selection),
+                                        workers=batch_workers),
+                    mimetype="application/x-ndjson")
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """
+    변환 캐시의 hit/miss/eviction 통계를 JSON으로 반환합니다.
+    메모리 캐시 통계는 응답한 워커 기준이며, 디스크 사용량은 모든 워커가 공유합니다.
+    """
+    return jsonify({"pdf2md": conversion_cache.stats(), "pdf2md_pages": page_cache.stats()})
+
+def run_conversion_job(queue, job_id, job):
+    """
+    (백그라운드 프로세스) /jobs로 접수된 PDF 변환 작업 하나를 실행합니다.
+    페이지가 하나 끝날 때마다 진행 상황(pages_done/pages_total)을 기록하고,
+    결과 {"markdown", "pages", "stats"}를 JSON 문자열로 반환합니다.
+    """
+    options = dict(job["options"])
+    page_numbers = options.pop("page_numbers")
+    with open(job["input_path"], "rb") as f:
+        pdf_bytes = f.read()
+    if page_numbers is None:
+        included_pages = list(range(1, count_pdf_pages(io.BytesIO(pdf_bytes)) + 1))
+    else:
+        included_pages = page_numbers
+    pages_total = len(included_pages)
+    queue.update_progress(job_id, job["claim"], 0, pages_total)
+
+    def convert():
+        page_contents = []
+        for _, page_markdown in iter_pdf_pages_markdown(io.BytesIO(pdf_bytes), stats=stats,
+                                                        page_numbers=page_numbers, **options):
+            page_contents.append(page_markdown)
+            if not queue.update_progress(job_id, job["claim"], len(page_contents), pages_total):
+                # 오래 멈춘 것으로 판단되어 다른 프로세스에 다시 배정된 작업: 더 진행하지 않습니다.
+                raise RuntimeError("작업이 다른 프로세스에 다시 배정되었습니다.")
+        return json.dumps({"markdown": "\n---\n".join(page_contents), "pages": included_pages}, ensure_ascii=False)
+
+    stats = {}
+    # 헤더/푸터 띠는 캐시 미스일 때 변환 과정에서만 탐지합니다 (키에는 crop_mode만 포함).
+    cache_key = make_cache_key(pdf_bytes, **conversion_cache_options(options["table_strategy"], options["engine"],
+                                                                     crop_mode=options.get("crop_mode", CROP_MODE),
+                                                                     pages=page_numbers))
+    value, _ = get_or_convert(conversion_cache, cache_key, convert, mode=options["cache_mode"])
+    queue.update_progress(job_id, job["claim"], pages_total, pages_total)
+    return json.dumps(dict(json.loads(value), stats=stats), ensure_ascii=False)
+
+def get_job_dispatcher():
+    """
+    작업 대기열과 디스패처를 (아직 없다면) 만들고 디스패처 스레드를 시작한 뒤 디스패처를 반환합니다.
+    대기열은 get_job_dispatcher().queue로 접근합니다.
+    """
+    global _job_dispatcher
+    with _job_lock:
+        if _job_dispatcher is None:
+            _job_dispatcher = JobDispatcher(JobQueue(), run_conversion_job)
+    _job_dispatcher.start()
+    return _job_dispatcher
+
+@app.route('/jobs', methods=['POST'])
+def create_job_endpoint():
+    """
+    PDF 변환을 비동기 작업으로 접수하고 바로 202와 작업 ID를 반환합니다.
+    변환은 백그라운드 프로세스 풀(PDF2MD_JOB_WORKERS)에서 진행되며, 진행 상황과 결과는 GET /jobs/<id>로 조회합니다.
+    /convert와 같은 form 옵션(cache, table_strategy, engine, low_memory, crop_mode, pages, first_n, max_pages)을 받습니다.
+    작업 하나는 프로세스 하나에서 직렬로 변환합니다 (workers/chunk_size는 무시).
+    """
+    if 'file' not in request.files:
+        return jsonify({"error": "파일이 제공되지 않았습니다."}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "선택된 파일이 없습니다."}), 400
+    try:
+        options, selection = parse_conversion_options(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    pdf_bytes = file.read()
+    try:
+        included_pages = selection.resolve(count_pdf_pages(io.BytesIO(pdf_bytes)))
+    except PageSelectionError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    options.update(workers=1, chunk_size=None, page_numbers=None if selection.is_all() else included_pages)
+
+    job_dispatcher = get_job_dispatcher()
+    job_id = job_dispatcher.queue.enqueue(pdf_bytes, ".pdf", options)
+    job_dispatcher.notify()
+    response = jsonify({"job_id": job_id, "status": "queued", "pages_total": len(included_pages)})
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return response, 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_endpoint(job_id):
+    """
+    비동기 변환 작업의 상태를 반환합니다.
+    status: "queued" / "running" / "done" / "failed"
+    pages_done/pages_total로 진행 상황을, 완료 시 markdown/pages/stats를, 실패 시 error를 함께 반환합니다.
+    """
+    # 서버 재시작 후에도 남은 작업이 처리되도록 조회 시에도 디스패처를 시작합니다.
+    job = get_job_dispatcher().queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    body = {
+        "job_id": job_id,
+        "status": job["status"],
+        "pages_done": job["pages_done"],
+        "pages_total": job["pages_total"],
+    }
+    if job["status"] == "done":
+        body.update(json.loads(job["result"]))
+    elif job["status"] == "failed":
+        body["error"] = job["error"]
+    return jsonify(body)
+
 ###############################
 # Markdown 분할(split) 함수들
 ###############################
@@ -157,101 +901,149 @@ def split_markdown_by_page(markdown_text):
     Markdown 문서를 '---' 구분자를 기준으로 페이지별로 분할합니다.
     각 분할된 결과는 페이지 내용(문자열)을 포함하는 리스트로 반환합니다.
     """
-    # 구분자가 양쪽에 여백이 있을 수 있으므로 패턴에 유의
-    pages = re.split(r'\n\s*---\s*\n', markdown_text)
-    # 빈 문자열은 제거한 후 반환
-    return [page.strip() for page in pages if page.strip()]
+    return list(iter_markdown_pages(markdown_text))
 
-def split_markdown_by_paragraph(markdown_text):
+# 페이지 구분자: 양쪽에 여백이 있을 수 있으므로 패턴에 유의
+PAGE_SEPARATOR_PATTERN = re.compile(r'\n\s*---\s*\n')
+
+def iter_markdown_pages(markdown_text):
     """
-    앞서 작성한 정교한 문단 분할 로직 (코드 블록 및 표 영역 고려)
+    split_markdown_by_page()와 같은 기준으로 페이지 내용을 하나씩 반환(yield)합니다.
+    빈 페이지는 건너뜁니다.
+    """
+    start = 0
+    for match in PAGE_SEPARATOR_PATTERN.finditer(markdown_text):
+        page = markdown_text[start:match.start()].strip()
+        if page:
+            yield page
+        start = match.end()
+    page = markdown_text[start:].strip()
+    if page:
+        yield page
+
+# 문단 분할용 사전 컴파일 패턴
+CODE_FENCE_PATTERN = re.compile(r'^(```+)')
+TABLE_LINE_PATTERN = re.compile(r'^\s*\|')
+
+def _iter_markdown_lines(source):
+    """
+    문자열 또는 줄 단위로 읽을 수 있는 텍스트 스트림(파일 객체, 줄 iterable)에서
+    str.splitlines()와 같은 기준으로 줄을 하나씩 반환합니다.
+    """
+    if isinstance(source, str):
+        yield from source.splitlines()
+        return
+    for chunk in source:
+        # 파일은 '\n' 기준으로만 끊어 읽으므로, splitlines()가 인식하는 나머지 줄바꿈 문자로 한 번 더 나눕니다.
+        yield from chunk.splitlines()
+
+def iter_markdown_paragraphs(source):
+    """
+    코드 블록 및 표 영역을 고려하여 Markdown 문단을 하나씩 반환(yield)하는 단일 패스 스캐너.
+    source는 Markdown 문자열 또는 텍스트 스트림(파일 객체 등)이며, 현재 문단의 줄만 메모리에 유지합니다.
+    - 백틱(```)으로 시작하는 줄은 코드 블록을 열고, 여는 구분자로 끝나는 줄에서 닫습니다. (첫 줄은 닫지 않음)
+    - 파이프(|)로 시작하는 줄은 표로 묶으며, 표 사이의 빈 줄은 다음 내용이 표이면 건너뜁니다.
+      (다음 내용을 미리 읽지 않고, 빈 줄 뒤에 처음 나오는 내용 줄에서 표를 이어갈지 결정합니다.)
+    - 그 외의 줄은 빈 줄을 기준으로 문단을 나눕니다.
     """
-    lines = markdown_text.splitlines()
-    paragraphs = []
     current_block = []
     current_block_type = None  # "normal", "table", "code"
     in_code_block = False
     code_block_delimiter = None
+    # 표 다음에 빈 줄이 나와 표를 이어갈지 아직 결정하지 못한 상태
+    pending_table_break = False
 
     def flush_block():
         nonlocal current_block, current_block_type
         if current_block:
             block_text = "\n".join(current_block).strip()
-            if block_text:
-                paragraphs.append(block_text)
             current_block = []
             current_block_type = None
+            return block_text
+        return ""
+
+    for index, line in enumerate(_iter_markdown_lines(source)):
+        if not line or line.isspace():
+            if current_block_type == "table":
+                pending_table_break = True
+            else:
+                block_text = flush_block()
+                if block_text:
+                    yield block_text
+            continue
+
+        is_table_line = False
+        code_block_match = CODE_FENCE_PATTERN.match(line) if line.startswith("```") else None
+        if code_block_match is None:
+            is_table_line = TABLE_LINE_PATTERN.match(line) is not None
+        if pending_table_break:
+            pending_table_break = False
+            if not is_table_line:
+                # 빈 줄 뒤가 표가 아니면 빈 줄 위치에서 표 문단을 끝냅니다.
+                block_text = flush_block()
+                if block_text:
+                    yield block_text
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
         # 코드 블록 처리 (백틱으로 시작)
-        code_block_match = re.match(r'^(```+)', line)
         if code_block_match:
             delimiter = code_block_match.group(1)
             if not in_code_block:
-                flush_block()
+                block_text = flush_block()
+                if block_text:
+                    yield block_text
                 in_code_block = True
                 current_block_type = "code"
                 code_block_delimiter = delimiter
             current_block.append(line)
-            if in_code_block and line.strip().endswith(code_block_delimiter) and i != 0:
-                flush_block()
+            if line.strip().endswith(code_block_delimiter) and index != 0:
+                block_text = flush_block()
+                if block_text:
+                    yield block_text
                 in_code_block = False
                 code_block_delimiter = None
-            i += 1
             continue
 
         # 테이블 라인 판단: 시작이 파이프(|)로 시작하면 테이블 라인으로 판단
-        is_table_line = bool(re.match(r'^\s*\|', line))
-        if is_table_line:
-            if current_block_type != "table":
-                flush_block()
-                current_block_type = "table"
-            current_block.append(line)
-            i += 1
-            continue
+        block_type = "table" if is_table_line else "normal"
+        if current_block_type != block_type:
+            block_text = flush_block()
+            if block_text:
+                yield block_text
+            current_block_type = block_type
+        current_block.append(line)
 
-        # 일반 텍스트 줄 처리
-        if line.strip() == "":
-            if current_block_type == "table":
-                j = i + 1
-                found_table = False
-                while j < len(lines):
-                    if lines[j].strip():
-                        if re.match(r'^\s*\|', lines[j]):
-                            found_table = True
-                        break
-                    j += 1
-                if found_table:
-                    i += 1
-                    continue
-            flush_block()
-            i += 1
-            continue
+    block_text = flush_block()
+    if block_text:
+        yield block_text
 
-        if current_block_type != "normal":
-            flush_block()
-            current_block_type = "normal"
-        current_block.append(line)
-        i += 1
+def split_markdown_by_paragraph(markdown_text):
+    """
+    앞서 작성한 정교한 문단 분할 로직 (코드 블록 및 표 영역 고려)
+    markdown_text는 문자열 또는 텍스트 스트림이며, 분할 규칙은 iter_markdown_paragraphs()를 따릅니다.
+    """
+    return list(iter_markdown_paragraphs(markdown_text))
 
-    flush_block()
-    return paragraphs
+SPLIT_METHODS = ("page", "paragraph")
 
-def split_markdown(markdown_text, split_method="page"):
+def iter_split_markdown(markdown_text, split_method="page"):
     """
-    split_method에 따라 Markdown 문서를 분할합니다.
-    - "page": '---' 구분자 기준 분할
-    - "paragraph": 코드 블록 및 표 영역을 고려한 문단 단위 분할
+    split_markdown()과 같은 결과를 분할 단위 하나씩 반환(yield)합니다.
     """
     if split_method == "page":
-        return split_markdown_by_page(markdown_text)
+        return iter_markdown_pages(markdown_text)
     elif split_method == "paragraph":
-        return split_markdown_by_paragraph(markdown_text)
+        return iter_markdown_paragraphs(markdown_text)
     else:
         raise ValueError("지원하지 않는 분할 방식입니다. 'page' 또는 'paragraph' 선택 가능.")
 
+def split_markdown(markdown_text, split_method="page"):
+    """
+    split_method에 따라 Markdown 문서를 분할합니다.
+    - "page": '---' 구분자 기준 분할
+    - "paragraph": 코드 블록 및 표 영역을 고려한 문단 단위 분할
+    """
+    return list(iter_split_markdown(markdown_text, split_method))
+
 @app.route('/split', methods=['POST'])
 def split_markdown_endpoint():
     """
@@ -336,6 +1128,88 @@ def reformat_markdown_endpoint():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+###############################
+# 변환 -> 분할 -> 재조정 파이프라인
+###############################
+
+# 파이프라인 재조정 단계: reformat_markdown()의 mode 또는 "none"(재조정 생략)
+PIPELINE_REFORMAT_MODES = ("sentence", "paragraph", "none")
+
+def iter_pipeline_chunks(markdown_text, split_method="page", mode="sentence"):
+    """
+    변환된 Markdown을 split_method로 분할하고, 분할 단위마다 reformat_markdown(mode)을 적용한 결과를
+    하나씩 반환(yield)합니다. mode가 "none"이면 분할 결과를 그대로 반환합니다.
+    """
+    for chunk in iter_split_markdown(markdown_text, split_method):
+        yield chunk if mode == "none" else reformat_markdown(chunk, mode=mode)
+
+def stream_pipeline_ndjson(markdown_text, split_method, mode, included_pages, stats):
+    """
+    파이프라인 결과를 {"index": 순번, "chunk": 내용} 레코드로 한 줄씩(NDJSON) 내보내고,
+    마지막에 요약 레코드 {"done": true, "chunks": 개수, "pages": 페이지 목록, "stats": 통계}를 내보냅니다.
+    """
+    count = 0
+    try:
+        for chunk in iter_pipeline_chunks(markdown_text, split_method, mode):
+            yield json.dumps({"index": count, "chunk": chunk}, ensure_ascii=False) + "\n"
+            count += 1
+    except Exception as e:
+        logging.exception("파이프라인 스트리밍 중 오류 발생")
+        yield json.dumps({"error": str(e), "chunks": count}, ensure_ascii=False) + "\n"
+        return
+    yield json.dumps({"done": True, "chunks": count, "pages": included_pages, "stats": stats}) + "\n"
+
+@app.route('/pipeline', methods=['POST'])
+def pipeline_endpoint():
+    """
+    PDF 파일 하나를 받아 변환(/convert) -> 분할(/split) -> 재조정(/reformat)을 서버에서 한 번에 수행하고
+    최종 분할 결과만 반환합니다. 전체 Markdown을 주고받는 왕복이 없어집니다.
+    선택 form 필드:
+      - split_method: "page"(기본값) / "paragraph"
+      - mode: "sentence"(기본값) / "paragraph" / "none"(재조정 생략)
+      - stream: "ndjson"이면 분할 단위를 NDJSON 레코드로 스트리밍
+      - 그 외 /convert와 같은 변환 옵션 (cache, table_strategy, engine, low_memory, crop_mode, pages 등)
+    응답: {"chunks": [...], "pages": 포함된 페이지 번호 목록, "stats": 통계} (X-Cache 헤더 포함)
+    """
+    if 'file' not in request.files:
+        return jsonify({"error": "파일이 제공되지 않았습니다."}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({"error": "선택된 파일이 없습니다."}), 400
+
+    split_method = request.values.get("split_method", "page")
+    if split_method not in SPLIT_METHODS:
+        return jsonify({"error": "지원하지 않는 분할 방식입니다. 'page' 또는 'paragraph' 선택 가능."}), 400
+    mode = request.values.get("mode", "sentence")
+    if mode not in PIPELINE_REFORMAT_MODES:
+        return jsonify({"error": f"지원하지 않는 mode입니다. {', '.join(PIPELINE_REFORMAT_MODES)} 중 선택 가능."}), 400
+    stream = request.values.get("stream", "")
+    if stream and stream != "ndjson":
+        return jsonify({"error": "지원하지 않는 stream 형식입니다. 'ndjson'만 선택 가능."}), 400
+    try:
+        options, selection = parse_conversion_options(request.values)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        result = convert_pdf_document(file.read(), options, selection)
+        record_pages(len(result["pages"]))
+        if stream:
+            response = Response(stream_pipeline_ndjson(result["markdown"], split_method, mode,
+                                                       result["pages"], result["stats"]),
+                                mimetype="application/x-ndjson")
+        else:
+            chunks = list(iter_pipeline_chunks(result["markdown"], split_method, mode))
+            response = jsonify({"chunks": chunks, "pages": result["pages"], "stats": result["stats"]})
+        response.headers["X-Cache"] = result["cache"]
+        return response
+    except PageSelectionError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        record_error(e)
+        return jsonify({"error": str(e)}), 500
+
 
 ###############################
 
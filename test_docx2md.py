@@ -0,0 +1,44 @@
+import fitz  # PyMuPDF
+
+import docx2md
+from docx2md import DocumentContext, extract_combined_markdown, extract_text_by_page_with_llama
+
+
+def make_pdf(texts):
+    """
+    페이지마다 texts의 문자열 하나를 쓴 PDF 바이트를 만듭니다.
+    """
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page()
+        page.insert_text((72, 144), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_llama_text_keyed_by_page_number():
+    # pymupdf4llm 페이지 텍스트가 1부터 시작하는 페이지 번호로 모여야 합니다.
+    pdf_bytes = make_pdf(["first page text", "second page text"])
+    with DocumentContext(pdf_bytes) as document:
+        page_items = extract_text_by_page_with_llama(document)
+    assert sorted(page_items) == [1, 2]
+    assert "first page text" in page_items[1][0].content
+    assert "second page text" in page_items[2][0].content
+
+
+def test_combined_markdown_serves_pages_from_llama_text(monkeypatch):
+    # pymupdf4llm 텍스트가 있는 페이지는 fallback(pdfplumber 텍스트/OCR)을 추출하지 않습니다.
+    fallback_pages = []
+    extract_page_text_items = docx2md.extract_page_text_items
+
+    def record_fallback(document, page_index, bands=None):
+        fallback_pages.append(page_index)
+        return extract_page_text_items(document, page_index, bands)
+
+    monkeypatch.setattr(docx2md, "extract_page_text_items", record_fallback)
+    pdf_bytes = make_pdf(["first page text", "second page text"])
+    markdown = extract_combined_markdown(pdf_bytes)
+    assert "first page text" in markdown
+    assert "second page text" in markdown
+    assert fallback_pages == []
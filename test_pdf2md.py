@@ -0,0 +1,57 @@
+import io
+
+import fitz  # PyMuPDF
+from werkzeug.datastructures import MultiDict
+
+import pdf2md
+from common.conversion_cache import ConversionCache
+from pdf2md import process_pdf_to_markdown
+
+
+def make_line_table_pdf():
+    """
+    가운데에 선(line)만으로 그린 2x2 표가 있는 한 페이지 PDF 바이트를 만듭니다. (사각형 그림 없음)
+    """
+    doc = fitz.open()
+    page = doc.new_page()
+    xs, ys = (100, 250, 400), (300, 330, 360)
+    for x in xs:
+        page.draw_line((x, ys[0]), (x, ys[-1]))
+    for y in ys:
+        page.draw_line((xs[0], y), (xs[-1], y))
+    for row, y in enumerate(ys[:-1]):
+        for col, x in enumerate(xs[:-1]):
+            page.insert_text((x + 10, y + 20), f"{'AB'[col]}{row + 1}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_pymupdf_engine_finds_line_only_table():
+    # 가로/세로 선의 영역은 면적이 0이어도 표 탐지 사전 검사를 통과해야 합니다.
+    stats = {}
+    markdown = process_pdf_to_markdown(io.BytesIO(make_line_table_pdf()), engine="pymupdf", stats=stats,
+                                       cache_mode="bypass")
+    assert stats.get("table_detection_run") == 1
+    assert "table_detection_skipped" not in stats
+    assert "| A1 | B1 |" in markdown
+    assert "| A2 | B2 |" in markdown
+
+
+def test_document_cache_hit_skips_pdf_parsing(monkeypatch):
+    # 캐시 적중 시에는 페이지 수 확인과 헤더/푸터 띠 탐지 없이 저장된 결과(포함 페이지 포함)를 반환합니다.
+    monkeypatch.setattr(pdf2md, "conversion_cache", ConversionCache("test", disk_dir=None))
+    options, selection = pdf2md.parse_conversion_options(MultiDict({"crop_mode": "detect", "first_n": "1"}))
+    pdf_bytes = make_line_table_pdf()
+    miss = pdf2md.convert_pdf_document(pdf_bytes, options, selection)
+    assert miss["cache"] == "MISS"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("캐시 적중 시 PDF를 파싱하면 안 됩니다.")
+
+    monkeypatch.setattr(pdf2md, "count_pdf_pages", fail)
+    monkeypatch.setattr(pdf2md, "resolve_page_bands", fail)
+    hit = pdf2md.convert_pdf_document(pdf_bytes, options, selection)
+    assert hit["cache"] == "HIT"
+    assert hit["pages"] == miss["pages"] == [1]
+    assert hit["markdown"] == miss["markdown"]